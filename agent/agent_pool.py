@@ -0,0 +1,46 @@
+from .multi_agent_workflow import MultiAgentWorkflow
+from typing import Dict, Iterable
+
+
+class AgentPool:
+    """Process-wide pool of ready-to-use workflows, one per model provider.
+
+    Building a workflow creates the coordinator, four sub-agents, their LLM clients
+    and tool wrappers, so it is done once per process instead of once per request.
+    """
+
+    def __init__(self):
+        self._workflows: Dict[str, MultiAgentWorkflow] = {}
+
+    def get_workflow(self, model_provider: str = "groq") -> MultiAgentWorkflow:
+        """Return the shared workflow for a provider, building it on first use"""
+        workflow = self._workflows.get(model_provider)
+        if workflow is None:
+            print(f"🧰 Building agent pool for provider: {model_provider}")
+            workflow = MultiAgentWorkflow(model_provider=model_provider)
+            self._workflows[model_provider] = workflow
+        return workflow
+
+    def warm_up(self, providers: Iterable[str] = ("groq",)):
+        """Eagerly build workflows so the first request does not pay the setup cost"""
+        for provider in providers:
+            try:
+                self.get_workflow(provider)
+            except Exception as e:
+                # Missing keys should not stop the API from starting; retry lazily.
+                print(f"⚠️ Could not warm up '{provider}' agents: {e}")
+
+    async def aclose(self):
+        """Release pooled workflows"""
+        self._workflows.clear()
+
+
+_agent_pool = None
+
+
+def get_agent_pool() -> AgentPool:
+    """Return the process-wide agent pool"""
+    global _agent_pool
+    if _agent_pool is None:
+        _agent_pool = AgentPool()
+    return _agent_pool
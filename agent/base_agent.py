@@ -1,41 +1,217 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Tuple, Type
+from contextlib import contextmanager
+from contextvars import ContextVar
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
+from utils.config_loader import load_config
+from utils.llm_cache import get_llm_cache
+from utils.rate_limiter import get_rate_limiter
+from utils.llm_router import LLMRouter, Route, get_circuit_breaker, get_routing_settings
+from utils.metrics import record_llm_usage, LLM_CALLS
 import os
 
+# Per-request agent state. Agents are shared across requests by the agent pool,
+# so anything request-specific must live in the request's context, not on the agent.
+_request_state: ContextVar = ContextVar("agent_request_state", default=None)
+
+
+@contextmanager
+def request_scope(**options):
+    """Give every agent a fresh, isolated memory (and request options) for one request"""
+    token = _request_state.set({"memory": {}, **options})
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+
+
+def request_option(name: str, default: Any = None) -> Any:
+    """Read an option of the current request scope (e.g. use_cache)"""
+    state = _request_state.get()
+    return default if state is None else state.get(name, default)
+
+
+def emit_event(event: str, **data):
+    """Publish a progress event to the current request's event sink (streaming clients)"""
+    sink = request_option("event_sink")
+    if sink is not None:
+        sink.put_nowait({"event": event, **data})
+
+
+DEFAULT_MODEL_SETTINGS = {
+    "groq": {"model_name": "llama3-8b-8192", "temperature": 0.1, "max_tokens": 1500},
+    "openai": {"model_name": "o4-mini", "temperature": 0.1},
+}
+
+
+def _model_settings(provider: str, agent_key: str) -> dict:
+    """Model for one provider: defaults, then the `llm` section, then the agent's override in `llm_routing.agents`"""
+    settings = dict(DEFAULT_MODEL_SETTINGS.get(provider, {}))
+    try:
+        settings.update(load_config().get("llm", {}).get(provider, {}) or {})
+    except FileNotFoundError:
+        pass
+    settings.update((get_routing_settings()["agents"].get(agent_key) or {}).get(provider) or {})
+    settings.pop("provider", None)
+    return settings
+
+
+def _structured_output_default() -> bool:
+    try:
+        return bool((load_config().get("structured_outputs", {}) or {}).get("enabled", False))
+    except FileNotFoundError:
+        return False
+
+
 class BaseAgent(ABC):
     """Base class for all specialized agents"""
     
     def __init__(self, name: str, role: str, model_provider: str = "groq"):
         self.name = name
         self.role = role
-        self.llm = self._initialize_llm(model_provider)
-        self.memory: List[Dict] = []
-        
-    def _initialize_llm(self, provider: str):
+        self.model_provider = model_provider
+        self.router = self._initialize_router(model_provider)
+        self.llm = self.router.routes[0].llm
+        self.llm_cache = get_llm_cache()
+        self.rate_limiter = self.router.routes[0].rate_limiter
+        self.structured_output_default = _structured_output_default()
+        self._memory: List[Dict] = []
+
+    @property
+    def agent_key(self) -> str:
+        """Short name used in config and events ("research", "coordinator", ...)"""
+        return self.name.split()[0].lower()
+
+    def _initialize_llm(self, provider: str, settings: Optional[dict] = None):
         """Initialize the language model"""
+        settings = settings or DEFAULT_MODEL_SETTINGS.get(provider, {})
         if provider == "groq":
             return ChatGroq(
                 groq_api_key=os.getenv('GROQ_API_KEY'),
-                model_name="llama3-8b-8192",
-                temperature=0.1,
-                max_tokens=1500,
+                model_name=settings["model_name"],
+                temperature=settings.get("temperature", 0.1),
+                max_tokens=settings.get("max_tokens", 1500),
             )
         # agar paid api hai to use krlo :)
         elif provider == "openai":
             return ChatOpenAI(
-                model_name="o4-mini",
+                model_name=settings["model_name"],
                 api_key=os.getenv('OPENAI_API_KEY'),
-                temperature=0.1
+                temperature=settings.get("temperature", 0.1),
+                max_tokens=settings.get("max_tokens"),
             )
+        raise ValueError(f"Unknown model provider: {provider!r} (expected 'groq' or 'openai')")
+
+    def _initialize_router(self, model_provider: str) -> LLMRouter:
+        """Routes for this agent: its own provider order, else `model_provider` then the other configured ones"""
+        routing = get_routing_settings()
+        providers = (routing["agents"].get(self.agent_key) or {}).get("providers")
+        if not providers:
+            providers = [model_provider] + [p for p in routing["providers"] if p != model_provider]
+        unknown = [provider for provider in providers if provider not in DEFAULT_MODEL_SETTINGS]
+        if unknown:
+            raise ValueError(f"Unknown model provider(s) for {self.name}: {unknown} (expected 'groq' or 'openai')")
+        routes = []
+        for provider in providers:
+            try:
+                llm = self._initialize_llm(provider, _model_settings(provider, self.agent_key))
+            except Exception as e:
+                if provider == providers[0]:
+                    raise  # the preferred provider must work, as before
+                # A backup without an API key is simply not used
+                print(f"⚠️ {self.name}: {provider} unavailable as a fallback ({str(e)[:80]})")
+                continue
+            routes.append(Route(provider, llm, get_rate_limiter(provider), get_circuit_breaker(provider)))
+        return LLMRouter(self.name, routes, routing)
+        
+    async def ainvoke(self, messages: List, use_cache: bool = True):
+        """Single entry point for every LLM call made by an agent.
+
+        Identical prompts for the same model settings are answered from the shared
+        LLM cache instead of being re-sent to the provider. Entries are keyed on the
+        primary model, so only answers that model gave are stored.
+        """
+        use_cache = use_cache and request_option("use_cache", True)
+        cacheable = use_cache and self.llm_cache.is_cacheable(self.llm)
+        if cacheable:
+            key = self.llm_cache.make_key(self.llm, messages)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                LLM_CALLS.inc(agent=self.name, outcome="cache_hit")
+                return cached
+        response, route, estimated_tokens = await self.router.ainvoke(messages, request_option("request_id"))
+        LLM_CALLS.inc(agent=self.name, outcome="provider")
+        usage = record_llm_usage(self.name, self.llm_cache.model_settings(route.llm)["model"], response)
+        route.rate_limiter.reconcile(estimated_tokens, usage.get("total_tokens"))
+        if cacheable and response.content and route.llm is self.llm:
+            self.llm_cache.set(key, response)
+        return response
+
+    def structured_output_enabled(self) -> bool:
+        """Typed (JSON) results for this request? Per-request option, else the config default"""
+        requested = request_option("structured_output")
+        return self.structured_output_default if requested is None else bool(requested)
+
+    async def ainvoke_structured(self, messages: List, schema: Type[BaseModel]) -> Tuple[Optional[BaseModel], Any]:
+        """Ask for JSON matching `schema`; returns (parsed result or None if unparseable, raw response)"""
+        parser = PydanticOutputParser(pydantic_object=schema)
+        instructions = parser.get_format_instructions()
+        if messages and isinstance(messages[0], SystemMessage):
+            messages = [SystemMessage(content=f"{messages[0].content}\n\n{instructions}")] + list(messages[1:])
+        else:
+            messages = [SystemMessage(content=instructions)] + list(messages)
+        response = await self.ainvoke(messages)
+        try:
+            return parser.parse(response.content), response
+        except Exception as e:
+            print(f"⚠️ {self.name}: output did not match {schema.__name__}, using it as text ({str(e)[:80]})")
+            return None, response
+
+    async def astream(self, messages: List, use_cache: bool = True) -> AsyncIterator[str]:
+        """Stream an LLM answer as text chunks, sharing the cache with ainvoke"""
+        use_cache = use_cache and request_option("use_cache", True)
+        cacheable = use_cache and self.llm_cache.is_cacheable(self.llm)
+        if cacheable:
+            key = self.llm_cache.make_key(self.llm, messages)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                LLM_CALLS.inc(agent=self.name, outcome="cache_hit")
+                yield cached.content
+                return
+        chunks = []
+        merged = route = None
+        estimated_tokens = 0
+        async for chunk, route, estimated_tokens in self.router.astream(messages, request_option("request_id")):
+            merged = chunk if merged is None else merged + chunk
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+        LLM_CALLS.inc(agent=self.name, outcome="provider")
+        if merged is not None:
+            usage = record_llm_usage(self.name, self.llm_cache.model_settings(route.llm)["model"], merged)
+            route.rate_limiter.reconcile(estimated_tokens, usage.get("total_tokens"))
+        if cacheable and chunks and route is not None and route.llm is self.llm:
+            # A fallback provider's answer must not be served later as the primary model's
+            self.llm_cache.set(key, AIMessage(content="".join(chunks)))
         
     @abstractmethod
     async def process(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Process a task specific to this agent"""
         pass
+
+    @property
+    def memory(self) -> List[Dict]:
+        """Interactions of the current request (instance memory outside a request scope)"""
+        state = _request_state.get()
+        if state is None:
+            return self._memory
+        return state["memory"].setdefault(self.name, [])
         
     def add_to_memory(self, interaction: Dict):
         """Add interaction to agent memory"""
-        self.memory.append(interaction)
\ No newline at end of file
+        self.memory.append(interaction)
@@ -1,6 +1,7 @@
 from .base_agent import BaseAgent
 from typing import Dict, Any
 from langchain.schema import HumanMessage, SystemMessage
+from .schemas import BudgetResult
 from utils.currency_converter import CurrencyConverter
 from utils.expense_calculator import Calculator
 import os
@@ -53,38 +54,98 @@ class BudgetAgent(BaseAgent):
         Give both daily and total estimates in USD. Be realistic and research-based.
         Include specific cost ranges for {budget_level} budget level."""
         
+        structured_output = self.structured_output_enabled()
+        if structured_output:
+            system_prompt += """
+        
+        Give one line per category with the daily cost for the whole group (or a one-off fixed cost).
+        Do NOT add up totals; they are calculated separately."""
+        
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Create detailed budget estimate for {destination} trip")
         ]
         
-        budget_analysis = await self.llm.ainvoke(messages)
+        breakdown = None
+        if structured_output:
+            structured, budget_analysis = await self.ainvoke_structured(messages, BudgetResult)
+            if structured is not None and structured.lines:
+                breakdown = self._calculate_totals(structured, duration, travelers)
+        else:
+            budget_analysis = await self.ainvoke(messages)
         
         return {
             "agent": self.name,
             "task_type": "budget_estimate",
             "destination": destination,
             "duration": duration,
-            "budget_breakdown": budget_analysis.content,
+            "budget_breakdown": self._render_breakdown(breakdown) if breakdown else budget_analysis.content,
+            "breakdown": breakdown,
             "status": "completed"
         }
         
+    def _calculate_totals(self, estimate: BudgetResult, duration: int, travelers: int) -> Dict:
+        """Totals from the LLM's per-line estimate, computed with the Calculator rather than by the model"""
+        lines = []
+        for line in estimate.lines:
+            total = self.calculator.calculate_total(
+                self.calculator.multiply(line.daily_usd or 0, duration), line.fixed_usd or 0
+            )
+            lines.append({"category": line.category, "daily": line.daily_usd, "fixed": line.fixed_usd, "total": round(total, 2)})
+        
+        subtotal = self.calculator.calculate_total(*(line["total"] for line in lines))
+        emergency_buffer = subtotal * estimate.emergency_buffer_pct / 100
+        grand_total = self.calculator.calculate_total(subtotal, emergency_buffer)
+        
+        return {
+            "currency": estimate.currency,
+            "lines": lines,
+            "subtotal": round(subtotal, 2),
+            "emergency_buffer_pct": estimate.emergency_buffer_pct,
+            "emergency_buffer": round(emergency_buffer, 2),
+            "grand_total": round(grand_total, 2),
+            "daily_budget": round(self.calculator.calculate_daily_budget(grand_total, duration), 2),
+            "per_person": round(grand_total / max(travelers, 1), 2),
+            "notes": estimate.notes
+        }
+        
+    @staticmethod
+    def _render_breakdown(breakdown: Dict) -> str:
+        """Markdown table for the computed budget"""
+        currency = breakdown["currency"]
+        rows = [f"| Category | Daily ({currency}) | Fixed ({currency}) | Total ({currency}) |", "|---|---|---|---|"]
+        for line in breakdown["lines"]:
+            daily = f"{line['daily']:,.0f}" if line["daily"] is not None else "-"
+            fixed = f"{line['fixed']:,.0f}" if line["fixed"] is not None else "-"
+            rows.append(f"| {line['category']} | {daily} | {fixed} | {line['total']:,.0f} |")
+        rows.append(f"| Emergency buffer ({breakdown['emergency_buffer_pct']:g}%) | | | {breakdown['emergency_buffer']:,.0f} |")
+        rows.append(f"| **Total** | **{breakdown['daily_budget']:,.0f}/day** | | **{breakdown['grand_total']:,.0f}** |")
+        text = "\n".join(rows) + f"\n\nPer person: {breakdown['per_person']:,.0f} {currency}"
+        if breakdown["notes"]:
+            text += "\n\n" + "\n".join(f"- {note}" for note in breakdown["notes"])
+        return text
+        
     async def _convert_currency(self, task: Dict) -> Dict:
         """Convert currency for budget planning"""
         from_currency = task.get("from_currency", "USD")
         to_currency = task.get("to_currency")
         amount = task.get("amount", 1000)
+        amounts = task.get("amounts")  # optional batch: many amounts converted in one call
         
         try:
-            converted_amount = self.currency_service.convert(amount, from_currency, to_currency)
+            if amounts is not None:
+                converted_amount = await self.currency_service.aconvert_many(amounts, from_currency, to_currency)
+            else:
+                converted_amount = await self.currency_service.aconvert(amount, from_currency, to_currency)
             
             return {
                 "agent": self.name,
                 "task_type": "currency_conversion",
                 "from_currency": from_currency,
                 "to_currency": to_currency,
-                "original_amount": amount,
+                "original_amount": amounts if amounts is not None else amount,
                 "converted_amount": converted_amount,
+                "rates_as_of": self.currency_service.staleness(),
                 "status": "completed"
             }
             
@@ -1,12 +1,26 @@
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, emit_event, request_option
 from .research_agent import ResearchAgent
 from .weather_agent import WeatherAgent
 from .budget_agent import BudgetAgent
 from .itinerary_agent import ItineraryAgent
-from typing import Dict, Any
+from .task_graph import TaskGraph
+from typing import Dict, Any, Optional
 from langchain.schema import HumanMessage, SystemMessage
-import asyncio
-import re
+from .schemas import TravelRequirements
+from utils.plan_cache import PlanCache
+from utils.metrics import timed_span
+from utils.rate_limiter import RateLimitExceeded
+from utils.llm_router import ProvidersUnavailable
+from utils.context_budget import get_context_budget, render_sections
+from utils.plan_renderer import render_plan, RENDERERS
+from utils.query_parser import parse_travel_query
+from utils.config_loader import load_config
+from prompt_library.prompt import PLAN_PROMPT_VERSION
+
+def _is_load_shedding(error: Exception) -> bool:
+    """Our own quota/admission limits (HTTP 429 for the client), as opposed to every provider being down"""
+    return isinstance(error, RateLimitExceeded) and not isinstance(error, ProvidersUnavailable)
+
 
 class CoordinatorAgent(BaseAgent):
     """Main coordinator that orchestrates all specialized agents"""
@@ -24,32 +38,81 @@ class CoordinatorAgent(BaseAgent):
         self.budget_agent = BudgetAgent(model_provider)
         self.itinerary_agent = ItineraryAgent(model_provider)
         
+        # Whole-plan cache shared by every request served by this coordinator
+        self.plan_cache = PlanCache()
+        
+        self.parsing_settings = {"llm_fallback": True, "confidence_threshold": 0.7}
+        try:
+            self.parsing_settings.update(load_config().get("requirements_parsing", {}) or {})
+        except FileNotFoundError:
+            pass
+        self.context_budget = get_context_budget("final_synthesis")
+        self.final_plan_settings = {"renderer": "llm"}
+        try:
+            self.final_plan_settings.update(load_config().get("final_plan", {}) or {})
+        except FileNotFoundError:
+            pass
+        
+    def _model_signature(self) -> str:
+        """Provider, model, prompt version, output mode and weather advisory mode that produced a plan (part of the plan cache key)"""
+        model_name = getattr(self.llm, "model_name", None) or self.model_provider
+        output_mode = "structured" if self.structured_output_enabled() else "text"
+        return (f"{self.model_provider}:{model_name}:{PLAN_PROMPT_VERSION}:{output_mode}:{self._renderer()}:"
+                f"weather-{self.weather_agent.advisory_mode()}")
+        
     async def process(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Coordinate the multi-agent travel planning process"""
         user_query = task.get("query", "")
-        
-        # Parse user requirements
-        requirements = await self._parse_user_requirements(user_query)
+        use_cache = task.get("use_cache", True)
+        
+        # Parse user requirements (the API has usually parsed the query already)
+        requirements = task.get("requirements")
+        if requirements is None:
+            with timed_span("requirements_parse"):
+                requirements = await self._parse_user_requirements(user_query)
+        
+        # Only pay for an LLM round trip when the local parse is unsure
+        if (self.parsing_settings["llm_fallback"]
+                and requirements.get("confidence", 0.0) < self.parsing_settings["confidence_threshold"]):
+            with timed_span("requirements_llm"):
+                requirements = await self._refine_requirements(requirements)
+        emit_event("requirements_parsed", destination=requirements["destination"], duration=requirements["duration"],
+                   source=requirements["parsed_fields"]["destination"], confidence=requirements.get("confidence"))
+        
+        # Identical requirements planned recently? Serve the stored plan.
+        if use_cache:
+            cached_plan, match = self.plan_cache.get(requirements, self._model_signature())
+            if cached_plan is not None:
+                print(f"⚡ Plan cache hit ({match}) for {requirements['destination']}")
+                return {**cached_plan, "cache": {"hit": True, "match": match}}
         
         # Coordinate agents in sequence
         planning_result = await self._coordinate_planning(requirements)
         
         # Generate final comprehensive response
         final_response = await self._generate_final_response(planning_result)
+        final_response["requirements"] = requirements
+        final_response["model"] = self._model_signature()
         
-        return final_response
+        # Only plans where every agent succeeded are worth reusing
+        contributions = final_response.get("agent_contributions", {}).values()
+        if not final_response["degraded"] and all(result.get("status") == "completed" for result in contributions):
+            self.plan_cache.set(requirements, self._model_signature(), final_response)
+        
+        return {**final_response, "cache": {"hit": False, "match": None}}
         
     async def _parse_user_requirements(self, query: str) -> Dict:
-        """Parse user query with better destination extraction"""
-        system_prompt = """Extract EXACT travel information from this query:
+        """Parse user query with the shared single-pass parser"""
+        requirements = parse_travel_query(query)
+        print(f" Final parsed - Destination: '{requirements['destination']}', Duration: {requirements['duration']} days")
+        return requirements
         
-        1. Destination (city/place name exactly as mentioned)
-        2. Duration in days
-        3. Budget level if mentioned
-        4. Number of travelers
+    async def _extract_requirements(self, query: str) -> Optional[TravelRequirements]:
+        """LLM extraction of the requirements into the TravelRequirements schema"""
+        system_prompt = """Extract EXACT travel information from this query.
         
         Focus on the EXACT destination mentioned. Do NOT assume or change the location.
-        """
+        Leave a field null when the query does not state it."""
         
         messages = [
             SystemMessage(content=system_prompt),
@@ -57,62 +120,59 @@ class CoordinatorAgent(BaseAgent):
         ]
         
         try:
-            analysis = await self._safe_llm_call(messages)
-            analysis_content = analysis.content
+            extracted, _ = await self.ainvoke_structured(messages, TravelRequirements)
+            return extracted
         except Exception as e:
-            analysis_content = f"Error in parsing: {str(e)}"
-        
-        
-        destination_patterns = [
-            r'trip (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-            r'visit ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)', 
-            r'travel (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-            r'go (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-            r'(\d+) day[s]? trip (?:to|in) ([A-Za-z\s,]+)',
-            r'(\d+) day[s]? (?:in|at) ([A-Za-z\s,]+)',
-            r'(?:in|at) ([A-Za-z\s,]+?) for \d+ day[s]?'
+            print(f"⚠️ Requirements extraction failed, keeping the local parse: {str(e)}")
+            return None
+    
+    async def _refine_requirements(self, requirements: Dict) -> Dict:
+        """Fill in whatever the local parser could not find from the LLM extraction"""
+        print(f"🧠 Low parse confidence ({requirements.get('confidence')}), asking the LLM")
+        extracted = await self._extract_requirements(requirements.get("original_query", ""))
+        if extracted is None:
+            return requirements
+        
+        refined = {**requirements, "parsed_fields": dict(requirements["parsed_fields"])}
+        if extracted.destination and requirements["parsed_fields"]["destination"] != "gazetteer":
+            refined["destination"] = extracted.destination.strip()
+            refined["parsed_fields"]["destination"] = "llm"
+        budget_level = (extracted.budget_level or "").lower()
+        for field, value in (("duration", extracted.duration_days), ("travelers", extracted.travelers),
+                             ("budget_level", budget_level if budget_level in ("low", "medium", "high") else None)):
+            if value and not requirements["parsed_fields"][field]:
+                refined[field] = value
+                refined["parsed_fields"][field] = True
+        if extracted.preferences:
+            refined["preferences"] = extracted.preferences
+        print(f" Refined - Destination: '{refined['destination']}', Duration: {refined['duration']} days")
+        return refined
+    
+    @staticmethod
+    def _describe_requirements(requirements: Dict) -> str:
+        """Requirements summary reported alongside the plan"""
+        sources = requirements.get("parsed_fields", {})
+        lines = [
+            f"Destination: {requirements.get('destination')} (source: {sources.get('destination') or 'none'})",
+            f"Duration: {requirements.get('duration')} days" + ("" if sources.get("duration") else " (default)"),
+            f"Budget level: {requirements.get('budget_level')}" + ("" if sources.get("budget_level") else " (default)"),
+            f"Travelers: {requirements.get('travelers')}" + ("" if sources.get("travelers") else " (default)"),
         ]
-        
-        destination = "Unknown"
-        query_lower = query.lower()
-        
-        print(f"🔍 Parsing query: '{query}'")
-        
-        for i, pattern in enumerate(destination_patterns):
-            match = re.search(pattern, query_lower, re.IGNORECASE)
-            if match:
-                if len(match.groups()) == 2:  # Pattern with duration and destination
-                    destination = match.group(2).strip().title()
-                else:
-                    destination = match.group(1).strip().title()
-                
-                destination = re.sub(r'\s+', ' ', destination).strip()
-                print(f"Found destination: '{destination}' using pattern {i+1}")
-                break
-            
-        # Extract duration
-        duration_match = re.search(r'(\d+)\s*day[s]?', query_lower)
-        duration = int(duration_match.group(1)) if duration_match else 5
-        
-        print(f" Final parsed - Destination: '{destination}', Duration: {duration} days")
-        
-        return {
-            "original_query": query,
-            "destination": destination,
-            "duration": duration,
-            "analysis": analysis_content
-        }
-        
+        if requirements.get("preferences"):
+            lines.append(f"Preferences: {', '.join(requirements['preferences'])}")
+        return "\n".join(lines)
     
     async def _coordinate_planning(self, requirements: Dict) -> Dict:
-        """Coordinate all agents to plan the trip"""
+        """Coordinate all agents to plan the trip.
+
+        Tasks run as a dependency graph: research, weather and budget start together,
+        and the itinerary starts as soon as its three inputs are ready.
+        """
         destination = requirements.get("destination")
         duration = requirements.get("duration", 5)
         
         print(f"🤖 Starting multi-agent planning for {destination} ({duration} days)...")
         
-        # Phase 1: Research & Weather (Parallel)
-        print("📊 Phase 1: Research and Weather Analysis...")
         research_task = {
             "type": "destination_research",
             "destination": destination,
@@ -124,51 +184,109 @@ class CoordinatorAgent(BaseAgent):
             "destination": destination
         }
         
-        # Run research and weather agents in parallel
-        research_result, weather_result = await asyncio.gather(
-            self.research_agent.process(research_task),
-            self.weather_agent.process(weather_task)
-        )
-        
-        print("✅ Research and Weather completed")
-        
-        # Phase 2: Budget Planning
-        print("💰 Phase 2: Budget Planning...")
         budget_task = {
             "type": "estimate_budget",
             "destination": destination,
             "duration": duration,
-            "budget_level": "medium",
-            "travelers": 1
+            "budget_level": requirements.get("budget_level", "medium"),
+            "travelers": requirements.get("travelers", 1)
         }
         
-        budget_result = await self.budget_agent.process(budget_task)
-        print("✅ Budget planning completed")
-        
-        # Phase 3: Itinerary Creation
-        print("📅 Phase 3: Itinerary Creation...")
-        itinerary_task = {
-            "type": "create_itinerary",
-            "destination": destination,
-            "duration": duration,
-            "attractions": research_result.get("research_data", ""),
-            "weather_info": weather_result.get("weather_analysis", ""),
-            "budget_info": budget_result.get("budget_breakdown", "")
-        }
+        def itinerary_task(inputs: Dict) -> Dict:
+            return {
+                "type": "create_itinerary",
+                "destination": destination,
+                "duration": duration,
+                "attractions": inputs["research"].get("research_data", ""),
+                "weather_info": inputs["weather"].get("weather_analysis", ""),
+                "budget_info": inputs["budget"].get("budget_breakdown", "")
+            }
+        
+        graph = TaskGraph()
+        graph.add_task("research", lambda inputs: self._run_agent("research_agent", self.research_agent, research_task))
+        graph.add_task("weather", lambda inputs: self._run_agent("weather_agent", self.weather_agent, weather_task))
+        graph.add_task("budget", lambda inputs: self._run_agent("budget_agent", self.budget_agent, budget_task))
+        graph.add_task(
+            "itinerary",
+            lambda inputs: self._run_agent("itinerary_agent", self.itinerary_agent, itinerary_task(inputs)),
+            depends_on=("research", "weather", "budget")
+        )
         
-        itinerary_result = await self.itinerary_agent.process(itinerary_task)
-        print("✅ Itinerary creation completed")
+        results = await graph.run()
+        execution = graph.report()
+        print(f"✅ Agent graph completed - critical path: {' → '.join(execution['critical_path'])} ({execution['critical_path_ms']} ms)")
         
         return {
-            "research": research_result,
-            "weather": weather_result,
-            "budget": budget_result,
-            "itinerary": itinerary_result,
+            "research": results["research"],
+            "weather": results["weather"],
+            "budget": results["budget"],
+            "itinerary": results["itinerary"],
+            "requirements_analysis": self._describe_requirements(requirements),
+            "execution": execution,
             "coordination_status": "completed"
         }
         
+    async def _run_agent(self, agent_key: str, agent: BaseAgent, task: Dict) -> Dict:
+        """Run one sub-agent and report its start/finish to streaming clients"""
+        emit_event("agent_started", agent=agent_key, name=agent.name)
+        try:
+            with timed_span("agent", agent=agent_key):
+                result = await agent.process(task)
+        except Exception as e:
+            if _is_load_shedding(e):
+                raise
+            # Provider outage: the plan goes ahead without this agent's section
+            print(f"❌ {agent.name} failed: {str(e)}")
+            result = {"agent": agent.name, "error": str(e), "status": "failed"}
+        emit_event("agent_completed", agent=agent_key, name=agent.name, status=result.get("status"))
+        return result
+        
+    def _renderer(self) -> str:
+        """"llm" (synthesis call) or "template" (deterministic layout); per request, else config"""
+        requested = request_option("renderer")
+        return requested if requested in RENDERERS else self.final_plan_settings["renderer"]
+        
     async def _generate_final_response(self, planning_result: Dict) -> Dict:
         """Generate comprehensive final response"""
+        emit_event("agent_started", agent="coordinator", name=self.name)
+        degraded = False
+        if self._renderer() == "template":
+            with timed_span("final_template"):
+                final_plan = render_plan(planning_result)
+            emit_event("token", text=final_plan)
+        else:
+            try:
+                final_plan = await self._synthesize_plan(planning_result)
+            except Exception as e:
+                if _is_load_shedding(e):
+                    raise
+                # Every provider failed: the agents' sections are still a usable plan
+                print(f"⚠️ Synthesis failed on every provider, using the template renderer: {str(e)}")
+                emit_event("degraded", reason="final_synthesis_failed")
+                with timed_span("final_template"):
+                    final_plan = render_plan(planning_result)
+                emit_event("token", text=final_plan)
+                degraded = True
+        emit_event("agent_completed", agent="coordinator", name=self.name, status="completed")
+        
+        return {
+            "agent": self.name,
+            "task_type": "comprehensive_travel_plan",
+            "final_plan": final_plan,
+            "requirements_analysis": planning_result.get("requirements_analysis", ""),
+            "execution": planning_result.get("execution", {}),
+            "agent_contributions": {
+                "research_agent": planning_result.get("research", {}),
+                "weather_agent": planning_result.get("weather", {}),
+                "budget_agent": planning_result.get("budget", {}),
+                "itinerary_agent": planning_result.get("itinerary", {})
+            },
+            "degraded": degraded,
+            "status": "completed"
+        }
+        
+    async def _synthesize_plan(self, planning_result: Dict) -> str:
+        """One LLM call that merges the agent outputs into the final plan"""
         system_prompt = """You are a master travel planning coordinator. Combine all the specialized agent outputs into a comprehensive, well-structured travel plan.
         
         Structure the response as a complete travel guide:
@@ -195,30 +313,31 @@ class CoordinatorAgent(BaseAgent):
         
         Make it engaging, informative, and actionable. Include specific details like costs, timings, and practical advice."""
         
-        # Combine all agent outputs
-        combined_data = {
+        # Combine all agent outputs, compacted to the synthesis context budget
+        combined_data, _ = self.context_budget.fit({
             "research": planning_result.get("research", {}).get("research_data", ""),
             "weather": planning_result.get("weather", {}).get("weather_analysis", ""),
             "budget": planning_result.get("budget", {}).get("budget_breakdown", ""),
             "itinerary": planning_result.get("itinerary", {}).get("itinerary", "")
-        }
+        })
+        agent_outputs = render_sections(combined_data, {
+            "research": "Destination Research",
+            "weather": "Weather Analysis",
+            "budget": "Budget Breakdown",
+            "itinerary": "Itinerary"
+        })
         
         messages = [
             SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Combine these agent outputs into final comprehensive travel plan: {combined_data}")
+            HumanMessage(content=f"Combine these agent outputs into final comprehensive travel plan:\n\n{agent_outputs}")
         ]
         
-        final_response = await self.llm.ainvoke(messages)
-        
-        return {
-            "agent": self.name,
-            "task_type": "comprehensive_travel_plan",
-            "final_plan": final_response.content,
-            "agent_contributions": {
-                "research_agent": planning_result.get("research", {}),
-                "weather_agent": planning_result.get("weather", {}),
-                "budget_agent": planning_result.get("budget", {}),
-                "itinerary_agent": planning_result.get("itinerary", {})
-            },
-            "status": "completed"
-        }
\ No newline at end of file
+        with timed_span("final_synthesis"):
+            if request_option("stream", False):
+                # Forward synthesis tokens to the client as soon as the model produces them
+                chunks = []
+                async for chunk in self.astream(messages):
+                    chunks.append(chunk)
+                    emit_event("token", text=chunk)
+                return "".join(chunks)
+            return (await self.ainvoke(messages)).content
\ No newline at end of file
@@ -1,6 +1,7 @@
 from .base_agent import BaseAgent
 from typing import Dict, Any
 from langchain.schema import HumanMessage, SystemMessage
+from utils.context_budget import get_context_budget
 
 class ItineraryAgent(BaseAgent):
     """Agent specialized in creating detailed day-by-day itineraries"""
@@ -12,6 +13,9 @@ class ItineraryAgent(BaseAgent):
             model_provider=model_provider
         )
         
+        # Research/weather/budget outputs are compacted to fit this prompt
+        self.context_budget = get_context_budget("itinerary")
+        
     async def process(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Process itinerary planning tasks"""
         task_type = task.get("type", "create_itinerary")
@@ -25,11 +29,17 @@ class ItineraryAgent(BaseAgent):
         """Create detailed day-by-day itinerary"""
         destination = task.get("destination")
         duration = task.get("duration", 5)
-        attractions = task.get("attractions", "")
-        weather_info = task.get("weather_info", "")
-        budget_info = task.get("budget_info", "")
         preferences = task.get("preferences", "")
         
+        context, context_report = self.context_budget.fit({
+            "attractions": task.get("attractions", ""),
+            "weather": task.get("weather_info", ""),
+            "budget": task.get("budget_info", "")
+        })
+        attractions = context["attractions"]
+        weather_info = context["weather"]
+        budget_info = context["budget"]
+        
         system_prompt = f"""You are an expert itinerary planner. Create a detailed {duration}-day itinerary for {destination}.
         
         Available Information:
@@ -62,7 +72,7 @@ class ItineraryAgent(BaseAgent):
             HumanMessage(content=f"Create comprehensive {duration}-day itinerary for {destination}")
         ]
         
-        itinerary = await self.llm.ainvoke(messages)
+        itinerary = await self.ainvoke(messages)
         
         return {
             "agent": self.name,
@@ -70,6 +80,7 @@ class ItineraryAgent(BaseAgent):
             "destination": destination,
             "duration": duration,
             "itinerary": itinerary.content,
+            "context_tokens": {"before": context_report["tokens_before"], "after": context_report["tokens_after"]},
             "status": "completed"
         }
         
@@ -99,7 +110,7 @@ class ItineraryAgent(BaseAgent):
             HumanMessage(content=f"Optimize this itinerary: {current_itinerary}")
         ]
         
-        optimized = await self.llm.ainvoke(messages)
+        optimized = await self.ainvoke(messages)
         
         return {
             "agent": self.name,
@@ -1,5 +1,8 @@
 from .coordinator_agent import CoordinatorAgent
-from typing import Dict, Any
+from .base_agent import request_scope
+from typing import Dict, Any, AsyncIterator, Optional
+import asyncio
+import uuid
 
 class MultiAgentWorkflow:
     """Main workflow orchestrator for multi-agent travel planning"""
@@ -7,21 +10,51 @@ class MultiAgentWorkflow:
     def __init__(self, model_provider: str = "groq"):
         self.coordinator = CoordinatorAgent(model_provider)
         
-    async def plan_trip(self, user_query: str) -> Dict[str, Any]:
-        """Main entry point for multi-agent trip planning"""
+    async def plan_trip(self, user_query: str, use_cache: bool = True, event_sink: Optional[asyncio.Queue] = None,
+                        requirements: Optional[Dict[str, Any]] = None,
+                        structured_output: Optional[bool] = None, renderer: Optional[str] = None) -> Dict[str, Any]:
+        """Main entry point for multi-agent trip planning (pass `requirements` if the query is already parsed)"""
         
         print("🚀 Starting Multi-Agent Travel Planning System...")
         print(f"📝 User Query: {user_query}")
         print("=" * 60)
         
         # Start coordination process
-        task = {"query": user_query}
-        result = await self.coordinator.process(task)
+        task = {"query": user_query, "use_cache": use_cache, "requirements": requirements}
+        with request_scope(use_cache=use_cache, event_sink=event_sink, stream=event_sink is not None,
+                           request_id=uuid.uuid4().hex, structured_output=structured_output, renderer=renderer):
+            result = await self.coordinator.process(task)
         
         print("=" * 60)
         print(" Multi-Agent Planning Completed!")
         
         return result
+
+    async def stream_trip(self, user_query: str, use_cache: bool = True,
+                          requirements: Optional[Dict[str, Any]] = None, structured_output: Optional[bool] = None,
+                          renderer: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Plan a trip while yielding progress events, synthesis tokens and finally the result"""
+        events: asyncio.Queue = asyncio.Queue()
+        planning = asyncio.create_task(self.plan_trip(
+            user_query, use_cache=use_cache, event_sink=events, requirements=requirements,
+            structured_output=structured_output, renderer=renderer
+        ))
+        try:
+            while True:
+                next_event = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({next_event, planning}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event in done:
+                    yield next_event.result()
+                    continue
+                next_event.cancel()
+                while not events.empty():
+                    yield events.get_nowait()
+                break
+            yield {"event": "result", "result": planning.result()}
+        finally:
+            # Client went away mid-stream: stop burning LLM calls for nobody
+            if not planning.done():
+                planning.cancel()
         
     def get_agent_status(self) -> Dict:
         """Get status of all agents"""
@@ -33,4 +66,4 @@ class MultiAgentWorkflow:
             "itinerary_agent": self.coordinator.itinerary_agent.name,
             "total_agents": 5,
             "status": "active"
-        }
\ No newline at end of file
+        }
@@ -1,9 +1,18 @@
 from .base_agent import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langchain.schema import HumanMessage, SystemMessage
+from .schemas import ResearchResult
 from utils.place_info_search import GooglePlaceSearchTool, TavilyPlaceSearchTool
+from utils.config_loader import load_config
+import asyncio
 import os
 
+DEFAULT_PLACES_SETTINGS = {
+    "max_concurrent_lookups": 4,
+    "race_providers": False,  # start Tavily alongside Google Places; the first good answer wins
+    "race_head_start_seconds": 0.0,  # how long Google gets before Tavily joins the race
+}
+
 class ResearchAgent(BaseAgent):
     """Agent specialized in destination research and attractions"""
     
@@ -15,6 +24,11 @@ class ResearchAgent(BaseAgent):
         )
         self.google_places_search = GooglePlaceSearchTool(os.getenv("GPLACES_API_KEY"))
         self.tavily_search = TavilyPlaceSearchTool()
+        self.places_settings = dict(DEFAULT_PLACES_SETTINGS)
+        try:
+            self.places_settings.update(load_config().get("places_lookup", {}) or {})
+        except FileNotFoundError:
+            pass
         
     async def process(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Process research tasks"""
@@ -48,26 +62,32 @@ class ResearchAgent(BaseAgent):
             HumanMessage(content=f"Research {destination} for a {duration} trip")
         ]
         
-        response = await self.llm.ainvoke(messages)
-        
-        # Get attractions data properly
+        # The attractions lookup runs while the LLM writes the research
+        attractions_lookup = asyncio.ensure_future(self._lookup_place("attractions", destination))
         try:
-            attractions = self.google_places_search.google_search_attractions(destination)
-        except:
-            attractions = self.tavily_search.tavily_search_attractions(destination)
+            if self.structured_output_enabled():
+                structured, response = await self.ainvoke_structured(messages, ResearchResult)
+            else:
+                structured, response = None, await self.ainvoke(messages)
+        except BaseException:
+            attractions_lookup.cancel()
+            raise
+        research_data = structured.to_markdown() if structured else response.content
+        attractions = await attractions_lookup
         
         # Store in memory
         self.add_to_memory({
             "task": "destination_research",
             "destination": destination,
-            "response": response.content
+            "response": research_data
         })
         
         return {
             "agent": self.name,
             "task_type": "destination_research",
             "destination": destination,
-            "research_data": response.content,
+            "research_data": research_data,
+            "structured": structured.model_dump() if structured else None,
             "attractions": attractions,
             "status": "completed"
         }
@@ -76,14 +96,8 @@ class ResearchAgent(BaseAgent):
         """Find attractions"""
         destination = task.get("destination")
         
-        try:
-            attractions = self.google_places_search.google_search_attractions(destination)
-            restaurants = self.google_places_search.google_search_restaurants(destination)
-            activities = self.google_places_search.google_search_activity(destination)
-        except:
-            attractions = self.tavily_search.tavily_search_attractions(destination)
-            restaurants = self.tavily_search.tavily_search_restaurants(destination)
-            activities = self.tavily_search.tavily_search_activity(destination)
+        places = await self._lookup_places(destination, ["attractions", "restaurants", "activities"])
+        attractions, restaurants, activities = places["attractions"], places["restaurants"], places["activities"]
             
         return {
             "agent": self.name,
@@ -95,6 +109,70 @@ class ResearchAgent(BaseAgent):
             "status": "completed"
         }
         
+    async def _lookup_places(self, destination: str, categories: List[str]) -> Dict[str, Any]:
+        """All categories at once, at most `max_concurrent_lookups` in flight"""
+        semaphore = asyncio.Semaphore(int(self.places_settings["max_concurrent_lookups"]))
+
+        async def bounded(lookup):
+            async with semaphore:
+                return await lookup
+
+        if self.places_settings["race_providers"]:
+            results = await asyncio.gather(*(bounded(self._lookup_place(c, destination)) for c in categories))
+            return dict(zip(categories, results))
+
+        results = await asyncio.gather(
+            *(bounded(self.google_places_search.asearch(c, destination)) for c in categories), return_exceptions=True
+        )
+        places = dict(zip(categories, results))
+        missing = [c for c, result in places.items()
+                   if isinstance(result, Exception) or not self.google_places_search.is_good_result(result)]
+        if missing:
+            # Whatever Google could not answer goes to Tavily in one batch, under the same bound
+            print(f"⚠️ Google Places had no answer for {missing}, using Tavily")
+            places.update(await self.tavily_search.abatch_search(destination, missing, semaphore=semaphore))
+        return places
+
+    async def _lookup_place(self, category: str, destination: str):
+        """Google Places, with Tavily as the fallback or (when racing) the competitor"""
+        if self.places_settings["race_providers"]:
+            return await self._race_place_lookup(category, destination)
+        try:
+            result = await self.google_places_search.asearch(category, destination)
+            if self.google_places_search.is_good_result(result):
+                return result
+        except Exception as e:
+            print(f"⚠️ Google Places {category} lookup failed, using Tavily: {str(e)[:80]}")
+        return await self.tavily_search.asearch(category, destination)
+
+    async def _race_place_lookup(self, category: str, destination: str):
+        """First good answer from Google Places or Tavily; the slower lookup is cancelled"""
+        google = asyncio.ensure_future(self.google_places_search.asearch(category, destination))
+        pending = {google}
+        head_start = float(self.places_settings["race_head_start_seconds"])
+        if head_start > 0:
+            await asyncio.wait(pending, timeout=head_start)
+        fallback, error = None, None
+        try:
+            if not (google.done() and google.exception() is None and
+                    self.google_places_search.is_good_result(google.result())):
+                pending.add(asyncio.ensure_future(self.tavily_search.asearch(category, destination)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif self.google_places_search.is_good_result(task.result()):
+                        return task.result()
+                    else:
+                        fallback = task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is None and error is not None:
+            raise error
+        return fallback
+
     async def _general_research(self, task: Dict) -> Dict:
         """General research fallback"""
         query = task.get("query", "")
@@ -104,7 +182,7 @@ class ResearchAgent(BaseAgent):
             HumanMessage(content=query)
         ]
         
-        response = await self.llm.ainvoke(messages)
+        response = await self.ainvoke(messages)
         
         return {
             "agent": self.name,
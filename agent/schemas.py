@@ -0,0 +1,93 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class TravelRequirements(BaseModel):
+    """Trip requirements as extracted by the LLM when local parsing is not confident"""
+    destination: Optional[str] = Field(None, description="City, region or country exactly as written in the query")
+    duration_days: Optional[int] = Field(None, ge=1, le=60, description="Trip length in days, if stated")
+    budget_level: Optional[str] = Field(None, description='"low", "medium" or "high", if stated or clearly implied')
+    travelers: Optional[int] = Field(None, ge=1, le=50, description="Number of people travelling, if stated")
+    preferences: List[str] = Field(default_factory=list, description="Interests or constraints mentioned (food, hiking, kids...)")
+
+
+def _bullets(items: List[str]) -> str:
+    return "\n".join(f"- {item}" for item in items)
+
+
+class Attraction(BaseModel):
+    name: str
+    category: str = Field("sight", description="sight, nature, beach, museum, food, nightlife, shopping, activity...")
+    why_visit: str = Field("", description="One short sentence")
+    estimated_cost_usd: Optional[float] = Field(None, ge=0, description="Entry or typical cost per person, if known")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Only if known, never guessed")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Only if known, never guessed")
+
+
+class ResearchResult(BaseModel):
+    """Destination research as typed fields"""
+    overview: str = Field(description="Two or three sentences")
+    best_time_to_visit: str
+    attractions: List[Attraction] = Field(default_factory=list, description="Must-visit places, most important first")
+    culture: List[str] = Field(default_factory=list, description="Local customs and etiquette")
+    safety: List[str] = Field(default_factory=list)
+    unique_experiences: List[str] = Field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        lines = [self.overview, f"\n**Best time to visit:** {self.best_time_to_visit}", "\n**Must-visit places:**"]
+        for place in self.attractions:
+            cost = ""
+            if place.estimated_cost_usd is not None:
+                cost = f" (~${place.estimated_cost_usd:g})" if place.estimated_cost_usd else " (free)"
+            lines.append(f"- {place.name} [{place.category}]{cost}: {place.why_visit}".rstrip(": "))
+        for title, items in (("Culture", self.culture), ("Safety", self.safety), ("Unique experiences", self.unique_experiences)):
+            if items:
+                lines.append(f"\n**{title}:**\n{_bullets(items)}")
+        return "\n".join(lines)
+
+
+class DailyForecast(BaseModel):
+    date: str = Field(description="YYYY-MM-DD")
+    temp_min_c: float
+    temp_max_c: float
+    conditions: str
+    rain_probability: Optional[float] = Field(None, ge=0, le=1)
+    good_for_outdoors: bool = True
+
+
+class WeatherResult(BaseModel):
+    """Weather analysis as typed fields"""
+    current_summary: str
+    daily: List[DailyForecast] = Field(default_factory=list)
+    best_outdoor_days: List[str] = Field(default_factory=list)
+    packing: List[str] = Field(default_factory=list)
+    activity_suggestions: List[str] = Field(default_factory=list)
+    warnings: List[str] = Field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        lines = [f"**Current:** {self.current_summary}"]
+        if self.daily:
+            lines.append("\n| Date | Min °C | Max °C | Conditions | Rain | Outdoors |\n|---|---|---|---|---|---|")
+            for day in self.daily:
+                rain = f"{day.rain_probability:.0%}" if day.rain_probability is not None else "-"
+                lines.append(f"| {day.date} | {day.temp_min_c:.0f} | {day.temp_max_c:.0f} | {day.conditions} | {rain} | "
+                             f"{'yes' if day.good_for_outdoors else 'no'} |")
+        for title, items in (("Best outdoor days", self.best_outdoor_days), ("Pack", self.packing),
+                             ("Suggested activities", self.activity_suggestions), ("Warnings", self.warnings)):
+            if items:
+                lines.append(f"\n**{title}:**\n{_bullets(items)}")
+        return "\n".join(lines)
+
+
+class BudgetLine(BaseModel):
+    category: str = Field(description="Accommodation, Food & Dining, Transportation, Activities, Shopping & Misc")
+    daily_usd: Optional[float] = Field(None, ge=0, description="Per day for the whole group, if it scales with days")
+    fixed_usd: Optional[float] = Field(None, ge=0, description="One-off cost for the whole group (e.g. flights)")
+
+
+class BudgetResult(BaseModel):
+    """Budget estimate as numeric lines; totals are computed locally, not by the LLM"""
+    currency: str = "USD"
+    lines: List[BudgetLine] = Field(default_factory=list)
+    emergency_buffer_pct: float = Field(10, ge=0, le=50)
+    notes: List[str] = Field(default_factory=list)
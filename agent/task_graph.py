@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+TaskFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class TaskGraph:
+    """Small DAG executor for agent tasks.
+
+    Each task declares the tasks it depends on and starts the moment they have all
+    finished, so independent work overlaps and total latency is bounded by the
+    longest dependency chain rather than by fixed phases.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Tuple[TaskFunc, Tuple[str, ...]]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._started_at: Optional[float] = None
+
+    def add_task(self, name: str, func: TaskFunc, depends_on: Iterable[str] = ()) -> "TaskGraph":
+        """Register a task; func receives a dict with the results of its dependencies"""
+        if name in self._tasks:
+            raise ValueError(f"Task '{name}' is already registered")
+        self._tasks[name] = (func, tuple(depends_on))
+        return self
+
+    def _validate(self):
+        for name, (_, deps) in self._tasks.items():
+            for dep in deps:
+                if dep not in self._tasks:
+                    raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+        # Depth-first search for cycles
+        state: Dict[str, int] = {}
+
+        def visit(name: str):
+            if state.get(name) == 1:
+                raise ValueError(f"Dependency cycle detected at task '{name}'")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for dep in self._tasks[name][1]:
+                visit(dep)
+            state[name] = 2
+
+        for name in self._tasks:
+            visit(name)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every task as soon as its dependencies resolve; returns results by task name"""
+        self._validate()
+        self.timings = {}
+        self._started_at = time.perf_counter()
+        running: Dict[str, asyncio.Task] = {}
+
+        async def run_task(name: str):
+            func, deps = self._tasks[name]
+            dep_results = await asyncio.gather(*(running[dep] for dep in deps))
+            start = time.perf_counter()
+            try:
+                return await func(dict(zip(deps, dep_results)))
+            finally:
+                end = time.perf_counter()
+                self.timings[name] = {
+                    "start_ms": round((start - self._started_at) * 1000, 1),
+                    "end_ms": round((end - self._started_at) * 1000, 1),
+                    "duration_ms": round((end - start) * 1000, 1),
+                }
+
+        for name in self._tasks:
+            running[name] = asyncio.ensure_future(run_task(name))
+        try:
+            results = await asyncio.gather(*running.values())
+        except BaseException:
+            for task in running.values():
+                task.cancel()
+            raise
+        return dict(zip(running.keys(), results))
+
+    def critical_path(self) -> List[str]:
+        """Chain of tasks that determined the total run time (first to last)"""
+        if not self.timings:
+            return []
+        current = max(self.timings, key=lambda name: self.timings[name]["end_ms"])
+        path = [current]
+        while True:
+            deps = [dep for dep in self._tasks[current][1] if dep in self.timings]
+            if not deps:
+                break
+            current = max(deps, key=lambda name: self.timings[name]["end_ms"])
+            path.append(current)
+        return list(reversed(path))
+
+    def report(self) -> Dict[str, Any]:
+        """Per-task timings plus the critical path for this run"""
+        path = self.critical_path()
+        total_ms = max((t["end_ms"] for t in self.timings.values()), default=0.0)
+        return {
+            "tasks": self.timings,
+            "critical_path": path,
+            "critical_path_ms": total_ms,
+            "summed_task_ms": round(sum(t["duration_ms"] for t in self.timings.values()), 1),
+        }
@@ -1,7 +1,11 @@
 from .base_agent import BaseAgent
 from typing import Dict, Any
 from langchain.schema import HumanMessage, SystemMessage
+from .schemas import WeatherResult
 from utils.weather_info import WeatherForecastTool
+from utils.forecast_summary import best_outdoor_days, format_weather_brief, summarize_forecast
+from utils.weather_advisory import ADVISORY_MODES, build_advisory, get_advisory_settings
+import asyncio
 import os
 
 class WeatherAgent(BaseAgent):
@@ -14,6 +18,12 @@ class WeatherAgent(BaseAgent):
             model_provider=model_provider
         )
         self.weather_service = WeatherForecastTool(os.getenv('OPENWEATHERMAP_API_KEY'))
+        self.advisory_settings = get_advisory_settings()
+
+    def advisory_mode(self) -> str:
+        """"rules" (advisory built from the forecast, no LLM call) or "llm" """
+        mode = self.advisory_settings.get("mode")
+        return mode if mode in ADVISORY_MODES else "llm"
         
     async def process(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Process weather-related tasks"""
@@ -29,41 +39,39 @@ class WeatherAgent(BaseAgent):
         destination = task.get("destination")
         
         try:
-            # Get weather data from the weather utility
-            current_weather = self.weather_service.get_current_weather(destination)
-            forecast_weather = self.weather_service.get_forecast_weather(destination)
-            
-            # Analyze weather with LLM
-            system_prompt = f"""You are a weather analysis specialist. Analyze this weather data for {destination} and provide:
-            
-            1. Current weather summary
-            2. 5-day forecast overview
-            3. Best days for outdoor activities
-            4. What to pack recommendations
-            5. Weather-based activity suggestions
-            6. Any weather warnings or considerations
-            
-            Be practical and helpful for travelers."""
+            # Get weather data from the weather utility (both calls in flight together)
+            current_weather, forecast_weather = await asyncio.gather(
+                self.weather_service.aget_current_weather(destination),
+                self.weather_service.aget_forecast_weather(destination)
+            )
             
             weather_data = {
                 "current": current_weather,
                 "forecast": forecast_weather
             }
+            forecast_days = summarize_forecast(forecast_weather)
             
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Weather data for {destination}: {weather_data}")
-            ]
-            
-            analysis = await self.llm.ainvoke(messages)
+            # Rules mode writes the advisory from the per-day aggregates: no LLM call unless polishing
+            if self.advisory_mode() == "rules":
+                structured = WeatherResult(**build_advisory(current_weather, forecast_weather, self.advisory_settings["thresholds"]))
+                weather_analysis = structured.to_markdown()
+                if self.advisory_settings.get("polish"):
+                    weather_analysis = await self._polish_advisory(destination, weather_analysis)
+            else:
+                structured, weather_analysis = await self._analyze_with_llm(destination, current_weather, forecast_weather)
             
             return {
                 "agent": self.name,
                 "task_type": "weather_forecast",
                 "destination": destination,
-                "weather_analysis": analysis.content,
+                "weather_analysis": weather_analysis,
+                "structured": structured.model_dump() if structured else None,
+                "forecast_days": forecast_days,
+                # Rules mode: the advisory's own dry-day-filtered list, so the response names one set of days
+                "best_outdoor_days": structured.best_outdoor_days if structured else best_outdoor_days(forecast_days),
                 "raw_weather_data": weather_data,
-                "status": "completed"
+                # No usable forecast (API down, unknown city): the plan still goes out but is not cached
+                "status": "completed" if any(day["temp_min_c"] is not None for day in forecast_days) else "degraded"
             }
             
         except Exception as e:
@@ -74,12 +82,52 @@ class WeatherAgent(BaseAgent):
                 "status": "failed"
             }
             
+    async def _analyze_with_llm(self, destination: str, current_weather: Dict, forecast_weather: Dict):
+        """Full advisory written by the LLM; returns (WeatherResult or None, markdown)"""
+        system_prompt = f"""You are a weather analysis specialist. Analyze this weather data for {destination} and provide:
+        
+        1. Current weather summary
+        2. 5-day forecast overview
+        3. Best days for outdoor activities
+        4. What to pack recommendations
+        5. Weather-based activity suggestions
+        6. Any weather warnings or considerations
+        
+        Be practical and helpful for travelers."""
+        
+        # Per-day aggregates instead of the raw JSON: an order of magnitude fewer prompt tokens
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Weather data for {destination}:\n{format_weather_brief(current_weather, forecast_weather)}")
+        ]
+        
+        if self.structured_output_enabled():
+            structured, analysis = await self.ainvoke_structured(messages, WeatherResult)
+        else:
+            structured, analysis = None, await self.ainvoke(messages)
+        return structured, structured.to_markdown() if structured else analysis.content
+        
+    async def _polish_advisory(self, destination: str, advisory: str) -> str:
+        """Optional prose pass over the rule-based advisory; keeps the rules text if the call fails"""
+        messages = [
+            SystemMessage(content=f"""You are a weather analysis specialist. Rewrite this weather advisory for {destination}
+            as friendly, practical guidance for travelers. Keep every date, number, packing item and warning;
+            do not add facts that are not in it."""),
+            HumanMessage(content=advisory)
+        ]
+        try:
+            response = await self.ainvoke(messages)
+            return response.content or advisory
+        except Exception as e:
+            print(f"⚠️ {self.name}: advisory polish failed, using the rule-based text ({str(e)[:80]})")
+            return advisory
+            
     async def _get_current_weather(self, task: Dict) -> Dict:
         """Get current weather"""
         destination = task.get("destination")
         
         try:
-            weather_data = self.weather_service.get_current_weather(destination)
+            weather_data = await self.weather_service.aget_current_weather(destination)
             
             if weather_data:
                 temp = weather_data.get('main', {}).get('temp', 'N/A')
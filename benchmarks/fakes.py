@@ -0,0 +1,245 @@
+"""Offline stand-ins for the LLM and every external API used by the agents.
+
+`install_fakes()` swaps them in process-wide so `MultiAgentWorkflow.plan_trip` and the
+FastAPI app run end-to-end with no network and no API keys. Latencies are drawn from
+configurable distributions so benchmark numbers are reproducible with a fixed seed.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "recorded_responses.json")
+
+# Caches in front of the (faked) external APIs; the plan and LLM caches honour use_cache instead
+TOOL_CACHE_NAMESPACES = ("places", "tavily", "current_weather", "forecast_weather", "exchange_rates")
+
+
+class LatencyModel:
+    """Latency distribution parsed from a spec string.
+
+    Specs: "0" (none), "0.8" or "fixed:0.8", "uniform:0.5,1.5" and
+    "lognormal:0.8,0.35" (median seconds, sigma). All values are in seconds.
+    """
+
+    def __init__(self, spec: str = "0", rng: Optional[random.Random] = None):
+        self.spec = spec
+        self.rng = rng or random.Random(0)
+        kind, _, params = spec.partition(":")
+        if params:
+            self.kind, self.params = kind, [float(v) for v in params.split(",")]
+        else:
+            value = float(kind or 0)
+            self.kind, self.params = ("fixed", [value]) if value > 0 else ("none", [])
+
+    def sample(self) -> float:
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(self.params[0], self.params[1])
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return median * self.rng.lognormvariate(0.0, sigma)
+        raise ValueError(f"Unknown latency distribution: {self.spec}")
+
+
+def load_recordings(path: str = FIXTURES_PATH) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        recordings = json.load(f)
+    recordings["forecast"] = build_forecast(recordings["forecast_template"])
+    return recordings
+
+
+def build_forecast(template: Dict[str, Any], slots: int = 40) -> Dict[str, Any]:
+    """Expand the recorded forecast template into a full 5-day, 3-hourly /forecast payload"""
+    items = []
+    base = template["start_timestamp"]
+    for i in range(slots):
+        entry = json.loads(json.dumps(template["slots"][i % len(template["slots"])]))
+        entry["dt"] = base + i * 3 * 3600
+        entry["dt_txt"] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(entry["dt"]))
+        items.append(entry)
+    return {**template["envelope"], "cnt": slots, "list": items}
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers from recorded agent outputs after a sampled delay"""
+
+    model_name: str = "fake-llama3-8b-8192"
+    temperature: float = 0.1
+    max_tokens: int = 1500
+    responses: Dict[str, str] = {}
+    latency: Any = None
+    tokens_per_second: float = 0.0  # > 0 spreads streamed chunks over time
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _pick_response(self, messages) -> str:
+        prompt = " ".join(str(message.content) for message in messages).lower()
+        for keyword, response in self.responses.items():
+            if keyword != "default" and keyword in prompt:
+                return response
+        return self.responses.get("default", "OK")
+
+    def _usage(self, messages, text: str) -> Dict[str, int]:
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        completion_tokens = len(text) // 4
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    def _result(self, messages) -> ChatResult:
+        text = self._pick_response(messages)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency.sample() if self.latency else 0)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency.sample() if self.latency else 0)
+        return self._result(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency.sample() if self.latency else 0)
+        text = self._pick_response(messages)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if self.tokens_per_second:
+                await asyncio.sleep(1.0 / self.tokens_per_second)
+            content = word if i == len(words) - 1 else word + " "
+            usage = self._usage(messages, text) if i == len(words) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content, usage_metadata=usage))
+
+
+class FakePlacesWrapper:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class FakePlacesTool:
+    """Blocking stand-in for GooglePlacesTool (runs on the blocking-I/O pool like the real one)"""
+    recordings: Dict[str, Any] = {}
+    latency: Optional[LatencyModel] = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def run(self, query: str) -> str:
+        time.sleep(self.latency.sample() if self.latency else 0)
+        return self.recordings["places"].replace("{query}", query)
+
+
+def _route(request: httpx.Request, recordings: Dict[str, Any]) -> httpx.Response:
+    path = request.url.path
+    if path.endswith("/weather"):
+        return httpx.Response(200, json=recordings["current_weather"])
+    if path.endswith("/forecast"):
+        return httpx.Response(200, json=recordings["forecast"])
+    if "/latest/" in path:
+        return httpx.Response(200, json=recordings["exchange_rates"])
+    if path.endswith("/search"):
+        query = json.loads(request.content)["query"]
+        return httpx.Response(200, json={"answer": recordings["tavily"].replace("{query}", query)})
+    return httpx.Response(404, json={"error": f"no recording for {path}"})
+
+
+def make_http_clients(recordings: Dict[str, Any], latency: LatencyModel):
+    """Async/sync client factories backed by recorded API responses"""
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency.sample())
+        return _route(request, recordings)
+
+    def sync_handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency.sample())
+        return _route(request, recordings)
+
+    async_clients: Dict[str, httpx.AsyncClient] = {}
+    sync_clients: Dict[str, httpx.Client] = {}
+
+    def get_async_client(base_url: str) -> httpx.AsyncClient:
+        if base_url not in async_clients:
+            async_clients[base_url] = httpx.AsyncClient(base_url=base_url, transport=httpx.MockTransport(async_handler))
+        return async_clients[base_url]
+
+    def get_sync_client(base_url: str) -> httpx.Client:
+        if base_url not in sync_clients:
+            sync_clients[base_url] = httpx.Client(base_url=base_url, transport=httpx.MockTransport(sync_handler))
+        return sync_clients[base_url]
+
+    return get_async_client, get_sync_client
+
+
+def install_fakes(llm_latency: str = "lognormal:0.8,0.35", tool_latency: str = "lognormal:0.25,0.3",
+                  seed: int = 0, enforce_rate_limits: bool = False, tokens_per_second: float = 0.0,
+                  recordings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Replace the LLM and all external APIs with local stand-ins (process-wide)"""
+    from agent.base_agent import BaseAgent
+    import utils.place_info_search as place_info_search
+    import utils.weather_info as weather_info
+    import utils.exchange_rates as exchange_rates
+    import utils.rate_limiter as rate_limiter
+
+    recordings = recordings or load_recordings()
+    os.environ.setdefault("TAVILY_API_KEY", "fake-tavily-key")  # Tavily goes through the faked HTTP clients
+    rng = random.Random(seed)
+    llm_latency_model = LatencyModel(llm_latency, rng)
+    tool_latency_model = LatencyModel(tool_latency, rng)
+
+    def fake_initialize_llm(self, provider: str, settings: Optional[dict] = None):
+        return FakeChatModel(
+            model_name=f"fake-{provider}",
+            responses=recordings["llm"],
+            latency=llm_latency_model,
+            tokens_per_second=tokens_per_second,
+        )
+
+    BaseAgent._initialize_llm = fake_initialize_llm
+
+    FakePlacesTool.recordings = recordings
+    FakePlacesTool.latency = tool_latency_model
+    place_info_search.GooglePlacesAPIWrapper = FakePlacesWrapper
+    place_info_search.GooglePlacesTool = FakePlacesTool
+
+    get_async_client, get_sync_client = make_http_clients(recordings, tool_latency_model)
+    for module in (weather_info, exchange_rates, place_info_search):
+        module.get_async_client = get_async_client
+        module.get_sync_client = get_sync_client
+
+    if not enforce_rate_limits:
+        # Measure the pipeline itself, not the free-tier quota
+        for provider in ("groq", "openai"):
+            rate_limiter._rate_limiters[provider] = rate_limiter.ProviderRateLimiter(
+                provider, requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12
+            )
+    return recordings
+
+
+def reset_caches():
+    """Empty every process cache so each benchmark run starts cold"""
+    from utils import cache as cache_module
+    for cache in cache_module._caches.values():
+        cache.clear()
+        cache.hits = cache.misses = 0
+
+
+def disable_tool_caches():
+    """Give every tool namespace a zero-capacity cache so each lookup reaches the fake API.
+
+    Must run before the agents build their tools, which look their caches up once.
+    """
+    from utils import cache as cache_module
+    settings = cache_module.get_cache_settings()
+    for namespace in TOOL_CACHE_NAMESPACES:
+        cache_module._caches[namespace] = cache_module.MemoryCache(namespace, settings["default_ttl_seconds"], 0)
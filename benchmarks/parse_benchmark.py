@@ -0,0 +1,81 @@
+"""Per-query cost of the shared query parser versus the regex chain it replaced.
+
+    python -m benchmarks.parse_benchmark --iterations 20000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_benchmark import DEFAULT_QUERIES, percentile
+from utils.query_parser import get_query_parser
+
+QUERIES = DEFAULT_QUERIES + [
+    "Flying from Delhi to Manali for a week with 3 friends",
+    "luxury honeymoon in the maldives, 6 nights",
+    "family of 4 going to new york city for 10 days, budget of 3000 usd",
+    "plan a trip to Ulaanbaatar for 4 days",
+    "what to do in Tbilisi",
+]
+
+# The nine patterns main.extract_destination_from_query tried in turn (destination only)
+LEGACY_PATTERNS = [
+    r'trip (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
+    r'visit ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
+    r'travel (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
+    r'go (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
+    r'plan.*?(?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
+    r'(\d+) day[s]? trip (?:to|in) ([A-Za-z\s,]+)',
+    r'(\d+) day[s]? (?:in|at) ([A-Za-z\s,]+)',
+    r'(?:in|at) ([A-Za-z\s,]+?) for \d+ day[s]?',
+    r'([A-Za-z\s,]+?) (?:for|in) \d+ day[s]?'
+]
+
+
+def legacy_parse(query: str):
+    """What one request used to cost: the API's pattern loop plus the coordinator's duration regex"""
+    query_lower = query.lower().strip()
+    destination = "Unknown_Destination"
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, query_lower, re.IGNORECASE)
+        if match:
+            destination = match.group(len(match.groups())).strip().title()
+            break
+    duration_match = re.search(r'(\d+)\s*day[s]?', query_lower)
+    return destination, int(duration_match.group(1)) if duration_match else 5
+
+
+def time_per_query(func, query: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(query)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark travel query parsing")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    query_parser = get_query_parser()
+    new_costs, legacy_costs = [], []
+    print(f"{'query':<70}{'parser us':>11}{'legacy us':>11}  parsed")
+    for query in QUERIES:
+        new_us = time_per_query(query_parser.parse, query, args.iterations)
+        legacy_us = time_per_query(legacy_parse, query, args.iterations)
+        new_costs.append(new_us)
+        legacy_costs.append(legacy_us)
+        parsed = query_parser.parse(query)
+        summary = f"{parsed['destination']} / {parsed['duration']}d / {parsed['travelers']}p / {parsed['budget_level']}"
+        print(f"{query[:68]:<70}{new_us:>11.1f}{legacy_us:>11.1f}  {summary}")
+
+    print(f"\nparser: mean {sum(new_costs) / len(new_costs):.1f}us p95 {percentile(new_costs, 95):.1f}us")
+    print(f"legacy: mean {sum(legacy_costs) / len(legacy_costs):.1f}us p95 {percentile(legacy_costs, 95):.1f}us "
+          f"(destination and duration only, and it ran twice per request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Offline load benchmark for the multi-agent planner.
+
+Runs the real workflow (or the FastAPI app in-process) against recorded LLM and tool
+responses with sampled latencies, so throughput and per-stage latency can be compared
+before and after a change without API keys or network access.
+
+    python -m benchmarks.run_benchmark --requests 50 --concurrency 8
+    python -m benchmarks.run_benchmark --mode api --llm-latency uniform:0.5,1.5 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import disable_tool_caches, install_fakes, reset_caches
+
+DEFAULT_QUERIES = [
+    "Plan a 5 day trip to Goa",
+    "I want to visit Paris for 4 days on a budget",
+    "Plan a 3-day trip to Tokyo with my family",
+    "Trip to Bali for 7 days",
+    "Explore Jaipur for 2 days",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def span_label(span: Dict[str, Any]) -> str:
+    """Stage name plus its agent/tool (and provider) label, e.g. "agent[weather]" or "llm_call[Budget Agent/groq]" """
+    for key in ("agent", "tool"):
+        if span.get(key):
+            provider = f"/{span['provider']}" if span.get("provider") else ""
+            return f"{span['stage']}[{span[key]}{provider}]"
+    return span["stage"]
+
+
+async def run_workflow_request(query: str, args) -> List[Dict]:
+    from agent.agent_pool import get_agent_pool
+    from utils.metrics import collect_trace, timed_span
+
+    workflow = get_agent_pool().get_workflow("groq")
+    with collect_trace() as spans:
+        with timed_span("request", endpoint="workflow"):
+            await workflow.plan_trip(query, use_cache=args.use_cache, structured_output=args.structured_output,
+                                     renderer=args.renderer)
+    return spans
+
+
+def make_api_runner(args):
+    import httpx
+    import main
+
+    from utils.plan_store import DEFAULT_PLAN_STORE_SETTINGS, PlanStore
+
+    output_dir = tempfile.mkdtemp(prefix="ninja_bench_")
+    main.plan_store = PlanStore({
+        **DEFAULT_PLAN_STORE_SETTINGS,
+        "sqlite_path": os.path.join(output_dir, "plans.sqlite3"),
+        "markdown_directory": output_dir,
+    })
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=None)
+    headers = {} if args.use_cache else {"X-Cache-Bypass": "1"}
+
+    async def run(query: str, args) -> List[Dict]:
+        payload = {"question": query, "include_metrics": True, "structured_output": args.structured_output,
+                   "renderer": args.renderer}
+        response = await client.post("/query", json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()["metrics"]["spans"]
+
+    return run, client
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    client = None
+    if args.mode == "api":
+        runner, client = make_api_runner(args)
+    else:
+        runner = run_workflow_request
+
+    queries = args.queries or DEFAULT_QUERIES
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors: List[str] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                spans = await runner(queries[i % len(queries)], args)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+            for span in spans:
+                if "duration_ms" in span:
+                    stages.setdefault(span_label(span), []).append(span["duration_ms"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    wall = time.perf_counter() - started
+    if client is not None:
+        await client.aclose()
+        import main
+        await main.plan_store.aclose()
+
+    from utils.cache import cache_stats
+    return {
+        "mode": args.mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "llm_latency": args.llm_latency,
+        "tool_latency": args.tool_latency,
+        "renderer": args.renderer or "config",
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, pct) * 1000, 1)
+            for name, pct in (("p50", 50), ("p95", 95), ("p99", 99))
+        },
+        "stages": {
+            label: {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+            }
+            for label, values in sorted(stages.items())
+        },
+        "cache_hit_rate": {name: stats["hit_rate"] for name, stats in cache_stats().items()},
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n=== Ninja Navigator benchmark ({report['mode']}) ===")
+    print(f"requests={report['requests']} concurrency={report['concurrency']} "
+          f"llm={report['llm_latency']} tools={report['tool_latency']} errors={report['errors']}")
+    for sample in report["error_samples"]:
+        print(f"  ❌ {sample}")
+    latency = report["latency_ms"]
+    print(f"throughput: {report['requests_per_second']} req/s over {report['wall_seconds']}s")
+    print(f"latency: p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms\n")
+    print(f"{'stage':<40}{'count':>8}{'mean ms':>12}{'p95 ms':>12}")
+    for label, stats in report["stages"].items():
+        print(f"{label:<40}{stats['count']:>8}{stats['mean_ms']:>12}{stats['p95_ms']:>12}")
+    if report["cache_hit_rate"]:
+        print("\ncache hit rate: " + ", ".join(f"{k}={v}" for k, v in report["cache_hit_rate"].items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load benchmark with recorded LLM/tool responses")
+    parser.add_argument("--mode", choices=["workflow", "api"], default="workflow",
+                        help="drive MultiAgentWorkflow directly or POST /query through the ASGI app")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.35",
+                        help='"0", "fixed:S", "uniform:A,B" or "lognormal:MEDIAN,SIGMA" (seconds)')
+    parser.add_argument("--tool-latency", default="lognormal:0.25,0.3")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="pace streamed LLM chunks (0 = no pacing)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--use-cache", action="store_true",
+                        help="keep plan/LLM/tool caches enabled (default: every request misses all of them)")
+    parser.add_argument("--enforce-rate-limits", action="store_true",
+                        help="apply the configured provider quotas instead of unlimited ones")
+    parser.add_argument("--structured-output", action="store_true", default=None,
+                        help="ask research/weather/budget agents for typed JSON results")
+    parser.add_argument("--renderer", choices=["llm", "template"], default=None,
+                        help="final plan renderer (default: config)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("queries", nargs="*", help="queries to cycle through (defaults to a fixed set)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Fakes must be installed before the agent pool builds any agents
+    install_fakes(
+        llm_latency=args.llm_latency,
+        tool_latency=args.tool_latency,
+        seed=args.seed,
+        enforce_rate_limits=args.enforce_rate_limits,
+        tokens_per_second=args.tokens_per_second,
+    )
+    reset_caches()
+    if not args.use_cache:
+        disable_tool_caches()
+    report = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# gunicorn -c gunicorn.conf.py main:app
+# Worker count, bind address and timeouts come from the `server` section of config/config.yaml.
+from utils.server import get_server_settings, shared_state_warnings
+
+_settings = get_server_settings()
+
+bind = f"{_settings['host']}:{_settings['port']}"
+workers = _settings["workers"]
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(_settings["timeout_seconds"])
+graceful_timeout = int(_settings["graceful_timeout_seconds"])
+keepalive = int(_settings["keepalive_seconds"])
+# Not preloaded: pooled HTTP clients, limiter queues and job workers are bound to each worker's event loop
+preload_app = False
+
+
+def on_starting(server):
+    for warning in shared_state_warnings(workers):
+        server.log.warning(warning)
@@ -1,18 +1,78 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from agent.multi_agent_workflow import MultiAgentWorkflow  # Changed import
-from utils.save_to_document import save_document
-from starlette.responses import JSONResponse
+from agent.agent_pool import get_agent_pool
+from utils.plan_store import PlanStore
+from utils.server import get_server_settings, run_server
+from utils.http_client import aclose_http_clients, warm_up_http_clients
+from utils.cache import cache_stats
+from utils.query_parser import parse_travel_query
+from utils.rate_limiter import get_admission_controller, rate_limit_stats, RateLimitExceeded
+from utils.job_queue import JobQueue
+from utils.llm_router import circuit_breaker_stats
+from utils.metrics import (
+    collect_trace, timed_span, summarize_trace, render_metrics, register_gauges, gauge_lines, REQUESTS
+)
+from starlette.responses import JSONResponse, StreamingResponse, PlainTextResponse
 import os
+import json
 import datetime
-import re
+import time
 from dotenv import load_dotenv
 from pydantic import BaseModel
+from typing import Optional, Literal
 import asyncio
+from contextlib import asynccontextmanager
 
 load_dotenv()
 
-app = FastAPI(title="Ninja Navigator AI - Multi-Agent Travel Planner")
+agent_pool = get_agent_pool()
+admission = get_admission_controller()
+plan_store = PlanStore()
+
+def runtime_gauges() -> list:
+    """Cache hit rates and limiter queues as Prometheus gauges"""
+    caches = cache_stats()
+    limits = rate_limit_stats()
+    lines = []
+    for field in ("hits", "misses", "hit_rate", "size"):
+        lines += gauge_lines(
+            f"ninja_cache_{field}", f"Cache {field.replace('_', ' ')} per cache namespace",
+            [({"cache": name}, stats[field]) for name, stats in caches.items()]
+        )
+    for field in ("queued", "granted", "rejected", "tokens_available"):
+        lines += gauge_lines(
+            f"ninja_rate_limiter_{field}", f"LLM provider rate limiter {field.replace('_', ' ')}",
+            [({"provider": name}, stats[field]) for name, stats in limits["providers"].items()]
+        )
+    for field in ("active", "waiting", "rejected"):
+        lines += gauge_lines(
+            f"ninja_admission_{field}", f"Planning requests {field}", [({}, limits["admission"][field])]
+        )
+    jobs = job_queue.stats()
+    for field in ("queued", "running", "completed", "failed", "rejected"):
+        lines += gauge_lines(f"ninja_jobs_{field}", f"Background planning jobs {field}", [({}, jobs[field])])
+    plans = plan_store.stats()
+    for field in ("pending_writes", "saved", "duplicates", "failed"):
+        lines += gauge_lines(
+            f"ninja_plan_store_{field}", f"Plan store {field.replace('_', ' ')}", [({}, plans[field])]
+        )
+    return lines
+
+register_gauges(runtime_gauges)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the shared agent pool once at startup (per worker) and release it and the HTTP pools on shutdown"""
+    settings = get_server_settings()
+    agent_pool.warm_up(settings["warm_up_providers"])
+    await warm_up_http_clients(settings["warm_up_hosts"])
+    yield
+    await job_queue.aclose()
+    await plan_store.aclose()
+    await agent_pool.aclose()
+    await aclose_http_clients()
+
+app = FastAPI(title="Ninja Navigator AI - Multi-Agent Travel Planner", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,50 +84,27 @@ app.add_middleware(
 
 class QueryRequest(BaseModel):
     question: str
+    include_metrics: bool = False  # attach per-stage timings and token usage to the response
+    structured_output: Optional[bool] = None  # typed agent results (None = config default)
+    renderer: Optional[Literal["llm", "template"]] = None  # "template" skips the synthesis LLM call
 
-def extract_destination_from_query(query: str) -> str:
-    """Extract destination from user query - IMPROVED VERSION"""
-    query_lower = query.lower().strip()
-    
-    # More comprehensive patterns to catch destinations
-    patterns = [
-        r'trip (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-        r'visit ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-        r'travel (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-        r'go (?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-        r'plan.*?(?:to|in) ([A-Za-z\s,]+?)(?:\s+for|\s+\d+|$)',
-        r'(\d+) day[s]? trip (?:to|in) ([A-Za-z\s,]+)',
-        r'(\d+) day[s]? (?:in|at) ([A-Za-z\s,]+)',
-        r'(?:in|at) ([A-Za-z\s,]+?) for \d+ day[s]?',
-        r'([A-Za-z\s,]+?) (?:for|in) \d+ day[s]?'
-    ]
-    
+def parse_query(query: str) -> dict:
+    """Parse the query once; the same requirements are handed to the coordinator"""
     print(f"🔍 Parsing query: '{query}'")
-    
-    for i, pattern in enumerate(patterns):
-        match = re.search(pattern, query_lower, re.IGNORECASE)
-        if match:
-            if len(match.groups()) == 2:  # Pattern with both duration and destination
-                destination = match.group(2).strip().title()
-            else:
-                destination = match.group(1).strip().title()
-            
-            # Clean up the destination
-            destination = re.sub(r'\s+', ' ', destination)  # Remove extra spaces
-            destination = destination.replace(',', '').strip()
-            
-            print(f" Found destination using pattern {i+1}: '{destination}'")
-            return destination
-    
-    # Fallback: Look for any proper noun-like words
-    words = query.split()
-    for word in words:
-        if word[0].isupper() and len(word) > 2 and word.lower() not in ['plan', 'trip', 'day', 'days', 'for', 'the', 'and']:
-            print(f" Fallback destination found: '{word}'")
-            return word
-    
-    print("❌ No destination found, using 'Unknown'")
-    return "Unknown_Destination"
+    requirements = parse_travel_query(query)
+    print(f"📍 Parsed - Destination: '{requirements['destination']}' "
+          f"({requirements['parsed_fields']['destination'] or 'not found'}), Duration: {requirements['duration']} days")
+    return requirements
+
+def destination_from_requirements(requirements: dict) -> str:
+    if not requirements["parsed_fields"]["destination"]:
+        print("❌ No destination found, using 'Unknown'")
+        return "Unknown_Destination"
+    return requirements["destination"]
+
+def extract_destination_from_query(query: str) -> str:
+    """Extract destination from user query"""
+    return destination_from_requirements(parse_query(query))
 
 @app.get("/")
 async def root():
@@ -78,53 +115,252 @@ async def root():
         "version": "2.0.0"
     }
 
+def cache_bypass_requested(request: Request) -> bool:
+    """True when the client asked to skip cached plans (X-Cache-Bypass or Cache-Control: no-cache)"""
+    bypass = request.headers.get("x-cache-bypass", "").lower() in ("1", "true", "yes")
+    return bypass or "no-cache" in request.headers.get("cache-control", "").lower()
+
 @app.post("/query")
-async def query_travel_agent(query: QueryRequest):
+async def query_travel_agent(query: QueryRequest, request: Request):
     """Endpoint to handle queries for the multi-agent travel system."""
     try:
         print(f"🎯 Received query: '{query.question}'")
         
-        # Extract destination FIRST for verification FOR the multi-agent system
-        destination = extract_destination_from_query(query.question)
-        print(f"📍 Extracted destination: '{destination}'")
-        
-        # Initialize multi-agent workflow
-        workflow = MultiAgentWorkflow(model_provider="groq")
-        
-        # Process with multi-agent system
-        result = await workflow.plan_trip(query.question)
+        # Parse once: the destination is used for verification and the requirements go to the coordinator
+        requirements = parse_query(query.question)
+        destination = destination_from_requirements(requirements)
         
-        # Verify the result is for the correct destination
-        final_output = result.get("final_plan", "No response generated")
+        # Reuse the pooled multi-agent workflow
+        workflow = agent_pool.get_workflow("groq")
         
-        # Double-check if the response mentions the correct destination
-        if destination.lower() not in final_output.lower() and destination != "Unknown_Destination":
-            print(f"⚠️ WARNING: Response may not be for {destination}")
-            # Add a note to clarify
-            final_output = f"# Travel Plan for {destination}\n\n{final_output}"
+        started = time.perf_counter()
+        with collect_trace() as spans:
+            with timed_span("request", endpoint="/query"):
+                # Process with multi-agent system (bounded number of plans in flight)
+                async with admission.slot():
+                    result = await workflow.plan_trip(
+                        query.question, use_cache=not cache_bypass_requested(request), requirements=requirements,
+                        structured_output=query.structured_output, renderer=query.renderer
+                    )
+                
+                response = build_query_response(
+                    destination, result, workflow, latency_ms=(time.perf_counter() - started) * 1000
+                )
         
-        # Save the document with the destination in the filename
-        saved_file = save_document(final_output, destination)
-        
-        if saved_file:
-            print(f"📄 Travel Plan saved as: {saved_file}")
-        
-        return {
-            "answer": final_output,
-            "destination_extracted": destination,  # Add this for debugging
-            "agent_contributions": result.get("agent_contributions", {}),
-            "planning_status": "completed",
-            "agents_involved": workflow.get_agent_status()
-        }
+        if query.include_metrics:
+            response["metrics"] = summarize_trace(spans)
+        REQUESTS.inc(endpoint="/query", status="ok")
+        return response
         
+    except RateLimitExceeded as e:
+        REQUESTS.inc(endpoint="/query", status="rejected")
+        print(f"🚦 Rejected under load: {str(e)}")
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
     except Exception as e:
+        REQUESTS.inc(endpoint="/query", status="error")
         print(f" Error: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+def build_query_response(destination: str, result: dict, workflow, latency_ms: Optional[float] = None) -> dict:
+    """Verify, store and shape a finished plan into the /query response body"""
+    # Verify the result is for the correct destination
+    final_output = result.get("final_plan", "No response generated")
+    resolved = result.get("requirements", {})
+    if resolved.get("parsed_fields", {}).get("destination") == "llm":
+        destination = resolved["destination"]
+    
+    # Double-check if the response mentions the correct destination
+    if destination.lower() not in final_output.lower() and destination != "Unknown_Destination":
+        print(f"⚠️ WARNING: Response may not be for {destination}")
+        # Add a note to clarify
+        final_output = f"# Travel Plan for {destination}\n\n{final_output}"
+    
+    # Stored off the event loop; the id is known before the write finishes
+    with timed_span("document_save"):
+        plan_id = plan_store.save_in_background({
+            "content": final_output,
+            "destination": destination,
+            "duration": resolved.get("duration"),
+            "query": resolved.get("original_query"),
+            "model": result.get("model"),
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None
+        })
+    
+    return {
+        "answer": final_output,
+        "destination_extracted": destination,  # Add this for debugging
+        "agent_contributions": result.get("agent_contributions", {}),
+        "planning_status": "completed",
+        "plan_id": plan_id,
+        "cache": result.get("cache", {}),
+        "execution": result.get("execution", {}),
+        "agents_involved": workflow.get_agent_status()
+    }
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/query/stream")
+async def stream_travel_agent(query: QueryRequest, request: Request):
+    """Same as /query, but streams agent progress and the final plan tokens as Server-Sent Events."""
+    print(f"🎯 Received streaming query: '{query.question}'")
+    requirements = parse_query(query.question)
+    destination = destination_from_requirements(requirements)
+    workflow = agent_pool.get_workflow("groq")
+    use_cache = not cache_bypass_requested(request)
+
+    async def event_stream():
+        started = time.perf_counter()
+        yield format_sse("started", {"destination_extracted": destination})
+        try:
+            with collect_trace() as spans, timed_span("request", endpoint="/query/stream"):
+                async with admission.slot():
+                    async for event in workflow.stream_trip(
+                        query.question, use_cache=use_cache, requirements=requirements,
+                        structured_output=query.structured_output, renderer=query.renderer
+                    ):
+                        name = event.pop("event")
+                        if name == "result":
+                            response = build_query_response(
+                                destination, event["result"], workflow,
+                                latency_ms=(time.perf_counter() - started) * 1000
+                            )
+                            if query.include_metrics:
+                                response["metrics"] = summarize_trace(spans)
+                            yield format_sse("result", response)
+                        else:
+                            yield format_sse(name, event)
+            REQUESTS.inc(endpoint="/query/stream", status="ok")
+        except RateLimitExceeded as e:
+            REQUESTS.inc(endpoint="/query/stream", status="rejected")
+            yield format_sse("error", {"error": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            REQUESTS.inc(endpoint="/query/stream", status="error")
+            print(f" Error: {str(e)}")
+            yield format_sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def run_planning_job(job: dict, progress) -> dict:
+    """Worker side of /jobs: plan the trip, reporting agent progress into the job record"""
+    request = job["request"]
+    requirements = parse_query(request["question"])
+    destination = destination_from_requirements(requirements)
+    workflow = agent_pool.get_workflow("groq")
+    started = time.perf_counter()
+    with collect_trace() as spans:
+        with timed_span("request", endpoint="/jobs"):
+            result = await workflow.plan_trip(
+                request["question"], use_cache=request["use_cache"], event_sink=progress,
+                requirements=requirements, structured_output=request["structured_output"],
+                renderer=request["renderer"]
+            )
+            response = build_query_response(
+                destination, result, workflow, latency_ms=(time.perf_counter() - started) * 1000
+            )
+    if request["include_metrics"]:
+        response["metrics"] = summarize_trace(spans)
+    REQUESTS.inc(endpoint="/jobs", status="ok")
+    return response
+
+job_queue = JobQueue(run_planning_job)
+
+def job_status(job: dict) -> dict:
+    """Job record without the (large) result"""
+    return {key: value for key, value in job.items() if key not in ("result", "request")}
+
+@app.post("/jobs", status_code=202)
+async def submit_job(query: QueryRequest, request: Request):
+    """Queue a planning request and return a job id immediately; poll /jobs/{id} for progress."""
+    try:
+        job = job_queue.submit({
+            "question": query.question,
+            "include_metrics": query.include_metrics,
+            "structured_output": query.structured_output,
+            "renderer": query.renderer,
+            "use_cache": not cache_bypass_requested(request)
+        })
+    except RateLimitExceeded as e:
+        REQUESTS.inc(endpoint="/jobs", status="rejected")
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    print(f"📥 Queued job {job['job_id']}: '{query.question}'")
+    return {
+        **job_status(job_queue.get(job["job_id"])),
+        "status_url": f"/jobs/{job['job_id']}",
+        "result_url": f"/jobs/{job['job_id']}/result"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, queue position and per-agent progress"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job '{job_id}'"})
+    return job_status(job)
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """The finished plan (same body as /query); 202 while the job is still queued or running"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job '{job_id}'"})
+    if job["status"] in ("queued", "running"):
+        return JSONResponse(status_code=202, content=job_status(job))
+    if job["status"] != "completed":
+        return JSONResponse(status_code=409, content=job_status(job))
+    return job["result"]
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job '{job_id}'"})
+    return job_status(job)
+
+@app.get("/plans")
+async def list_plans(limit: Optional[int] = None, cursor: Optional[str] = None, destination: Optional[str] = None):
+    """Stored plans, newest first; follow next_cursor for the next page"""
+    try:
+        return await plan_store.alist(limit=limit, cursor=cursor, destination=destination)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+@app.get("/plans/search")
+async def search_plans(q: str, limit: Optional[int] = None, offset: int = 0):
+    """Full-text search over destination, query and plan text, best match first"""
+    return await plan_store.asearch(q, limit=limit, offset=offset)
+
+@app.get("/plans/{plan_id}")
+async def get_plan(plan_id: str):
+    """One stored plan with its markdown"""
+    plan = await plan_store.aget(plan_id)
+    if plan is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown plan '{plan_id}'"})
+    return plan
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: stage latency histograms, token usage, cache and limiter gauges"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/agents/status")
 async def get_agents_status():
     """Get status of all agents in the system"""
-    workflow = MultiAgentWorkflow()
+    workflow = agent_pool.get_workflow("groq")
     return workflow.get_agent_status()
 
 @app.get("/health")
@@ -134,9 +370,13 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.datetime.now().isoformat(),
         "system": "Multi-Agent AI Travel Planning",
-        "agents": 5
+        "agents": 5,
+        "cache": cache_stats(),
+        "rate_limits": rate_limit_stats(),
+        "llm_providers": circuit_breaker_stats(),
+        "jobs": job_queue.stats(),
+        "plan_store": plan_store.stats()
     }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    run_server()
\ No newline at end of file
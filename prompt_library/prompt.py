@@ -21,4 +21,7 @@ SYSTEM_PROMPT = SystemMessage(
     Use the available tools to gather information and make detailed cost breakdowns.
     Provide everything in one comprehensive response formatted in clean Markdown.
     """
-)
\ No newline at end of file
+)
+
+# Bump whenever any multi-agent prompt changes so cached plans from older prompts are not reused.
+PLAN_PROMPT_VERSION = "multi-agent-v2"
@@ -1,11 +1,30 @@
 import streamlit as st
 import requests
 import datetime
+import json
 from utils.save_to_document import save_document
 
 # Configuration
 BASE_URL = "http://localhost:8000"  # FastAPI backend URL
 
+AGENT_PROGRESS = {
+    "research_agent": "📊 Research Agent analyzing destination...",
+    "weather_agent": "🌤️ Weather Agent checking forecast...",
+    "budget_agent": "💰 Budget Agent calculating costs...",
+    "itinerary_agent": "📅 Itinerary Agent creating schedule...",
+    "coordinator": "🎯 Coordinator Agent finalizing plan...",
+}
+
+def iter_sse_events(response):
+    """Yield (event, data) pairs from a Server-Sent Events response"""
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:") and event:
+            yield event, json.loads(line[len("data:"):].strip())
+            event = None
+
 # Page config
 st.set_page_config(
     page_title="🤖 Ninja Navigator AI - Multi-Agent Travel Planner",
@@ -37,6 +56,9 @@ with st.sidebar:
             st.error(" Agents Offline")
     except:
         st.warning(" Connection to agents pending...")
+    
+    st.header("⚙️ Options")
+    fast_assemble = st.toggle("⚡ Fast assemble", help="Build the final plan from the agent sections without the final LLM pass")
 
 # Main interface
 st.write("---")
@@ -66,21 +88,38 @@ submit_button = st.button("🚀 Start Multi-Agent Planning", type="primary", use
 # Response section
 if submit_button and user_input.strip():
     
-    # Show loading with agent status
+    # Show live agent progress streamed from the backend
     with st.spinner("🤖 Multi-Agent System Working..."):
-        st.info("📊 Research Agent analyzing destination...")
-        st.info("🌤️ Weather Agent checking forecast...")
-        st.info("💰 Budget Agent calculating costs...")
-        st.info("📅 Itinerary Agent creating schedule...")
-        st.info("🎯 Coordinator Agent finalizing plan...")
+        progress = st.status("🤖 Agents at work...", expanded=True)
         
         try:
-            # Make API call
-            payload = {"question": user_input}
-            response = requests.post(f"{BASE_URL}/query", json=payload)
-
-            if response.status_code == 200:
-                data = response.json()
+            # Make streaming API call
+            payload = {"question": user_input, "renderer": "template" if fast_assemble else None}
+            data, error = None, None
+            plan_preview = st.empty()
+            streamed_plan = ""
+            with requests.post(f"{BASE_URL}/query/stream", json=payload, stream=True, timeout=(10, 600)) as response:
+                if response.status_code != 200:
+                    error = response.text
+                else:
+                    for event, event_data in iter_sse_events(response):
+                        if event == "requirements_parsed":
+                            progress.write(f"🧭 Planning {event_data['duration']} days in {event_data['destination']}")
+                        elif event == "agent_started":
+                            progress.write(AGENT_PROGRESS.get(event_data["agent"], f"⚙️ {event_data['name']} working..."))
+                        elif event == "agent_completed":
+                            progress.write(f"✅ {event_data['name']} finished")
+                        elif event == "token":
+                            streamed_plan += event_data["text"]
+                            plan_preview.markdown(streamed_plan)
+                        elif event == "result":
+                            data = event_data
+                        elif event == "error":
+                            error = event_data.get("error")
+            plan_preview.empty()
+
+            if data is not None:
+                progress.update(label="✅ Multi-Agent Planning Completed!", state="complete", expanded=False)
                 answer = data.get("answer", "No answer returned.")
                 destination_extracted = data.get("destination_extracted", "Unknown")
                 agents_involved = data.get("agents_involved", {})
@@ -156,7 +195,8 @@ if submit_button and user_input.strip():
                         st.rerun()
 
             else:
-                st.error(f" Multi-Agent System Error: {response.text}")
+                progress.update(label="Multi-Agent System Error", state="error")
+                st.error(f" Multi-Agent System Error: {error}")
                 
         except Exception as e:
             st.error(f" Connection Error: {str(e)}")
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+import tools.arithematic_op_tool as arithmetic_tools
+from utils.exchange_rates import ExchangeRateStore
+
+
+def fresh_store() -> ExchangeRateStore:
+    store = ExchangeRateStore(api_key=None)
+    store._load_table({"rates": {"USD": 1.0, "EUR": 0.9, "INR": 83.0}, "fetched_at": time.time()})
+    return store
+
+
+def test_cross_rate_uses_table():
+    assert fresh_store().cross_rate("EUR", "INR") == pytest.approx(83.0 / 0.9)
+
+
+def test_cross_rate_falls_back_to_pair_rate_for_currency_missing_from_table():
+    store = fresh_store()
+    store.record_pair_rate("USD", "XAU", 0.0005, source="alpha_vantage")
+    assert store.cross_rate("USD", "XAU") == pytest.approx(0.0005)
+    assert store.cross_rate("XAU", "USD") == pytest.approx(2000.0)
+
+
+def test_cross_rate_still_rejects_unknown_currency():
+    with pytest.raises(ValueError, match="XAU not found"):
+        fresh_store().cross_rate("USD", "XAU")
+
+
+def test_currency_converter_fetches_and_uses_missing_pair(monkeypatch):
+    store = fresh_store()
+    requested = []
+
+    class FakeAlphaVantage:
+        def _get_exchange_rate(self, from_curr, to_curr):
+            requested.append((from_curr, to_curr))
+            return {"Realtime Currency Exchange Rate": {"5. Exchange Rate": "0.0005"}}
+
+    monkeypatch.setenv("ALPHAVANTAGE_API_KEY", "test")
+    monkeypatch.setattr(arithmetic_tools, "get_rate_store", lambda: store)
+    monkeypatch.setattr(arithmetic_tools, "AlphaVantageAPIWrapper", FakeAlphaVantage)
+
+    args = {"from_curr": "USD", "to_curr": "XAU", "value": 1000}
+    assert arithmetic_tools.currency_converter.invoke(args) == pytest.approx(0.5)
+    # The recorded pair rate answers the next call without another API request
+    assert arithmetic_tools.currency_converter.invoke(args) == pytest.approx(0.5)
+    assert requested == [("USD", "XAU")]
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 load_dotenv()
 from langchain.tools import tool
 from langchain_community.utilities.alpha_vantage import AlphaVantageAPIWrapper
+from utils.exchange_rates import get_rate_store
 
 @tool
 def multiply(a: int, b: int) -> int:
@@ -36,8 +37,12 @@ def add(a: int, b: int) -> int:
 def currency_converter(from_curr: str, to_curr: str, value: float)->float:
     """Convert currency from one type to another using Alpha Vantage API."""
     
-    os.environ["ALPHAVANTAGE_API_KEY"] = os.getenv('ALPHAVANTAGE_API_KEY')
-    alpha_vantage = AlphaVantageAPIWrapper()
-    response = alpha_vantage._get_exchange_rate(from_curr, to_curr)
-    exchange_rate = response['Realtime Currency Exchange Rate']['5. Exchange Rate']
-    return value * float(exchange_rate)
\ No newline at end of file
+    # Share the process-wide rate store: reuse a fresh table/pair rate when we have one
+    rate_store = get_rate_store()
+    if not rate_store.has_rate(from_curr, to_curr):
+        os.environ["ALPHAVANTAGE_API_KEY"] = os.getenv('ALPHAVANTAGE_API_KEY')
+        alpha_vantage = AlphaVantageAPIWrapper()
+        response = alpha_vantage._get_exchange_rate(from_curr, to_curr)
+        exchange_rate = response['Realtime Currency Exchange Rate']['5. Exchange Rate']
+        rate_store.record_pair_rate(from_curr, to_curr, float(exchange_rate), source="alpha_vantage")
+    return value * rate_store.cross_rate(from_curr, to_curr)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 from utils.weather_info import WeatherForecastTool
+from utils.forecast_summary import best_outdoor_days, format_day, summarize_forecast
 from langchain.tools import tool
 from typing import List
 from dotenv import load_dotenv
@@ -27,14 +28,12 @@ class WeatherInfoTool:
         def get_weather_forecast(city: str) -> str:
             """Get weather forecast for a city"""
             forecast_data = self.weather_service.get_forecast_weather(city)
-            if forecast_data and 'list' in forecast_data:
-                forecast_summary = []
-                for i in range(len(forecast_data['list'])):
-                    item = forecast_data['list'][i]
-                    date = item['dt_txt'].split(' ')[0]
-                    temp = item['main']['temp']
-                    desc = item['weather'][0]['description']
-                    forecast_summary.append(f"{date}: {temp} degree celcius , {desc}")
+            days = summarize_forecast(forecast_data)
+            if days:
+                forecast_summary = [format_day(day) for day in days]
+                best = best_outdoor_days(days)
+                if best:
+                    forecast_summary.append(f"Best outdoor days: {', '.join(best)}")
                 return f"Weather forecast for {city}:\n" + "\n".join(forecast_summary)
             return f"Could not fetch forecast for {city}"
     
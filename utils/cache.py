@@ -0,0 +1,295 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from utils.config_loader import load_config
+from utils.gazetteer import get_gazetteer
+
+# Lookups keyed by destination (weather, places, Tavily) repeat constantly for popular
+# places, so they go through a small TTL + LRU cache. "memory" is per process;
+# "sqlite" shares entries between worker processes on the same box and "redis"
+# (or any Redis-compatible server) shares them between boxes as well.
+
+DEFAULT_CACHE_SETTINGS = {
+    "backend": "memory",
+    "sqlite_path": ".cache/ninja_navigator_cache.sqlite3",
+    "redis_url": "redis://localhost:6379/0",
+    "default_ttl_seconds": 3600,
+    "default_max_entries": 1024,
+    "namespaces": {},
+}
+
+
+def normalize_destination_key(destination: str) -> str:
+    """Canonical key for a destination: 'Goa', 'goa india' and 'North Goa' share the gazetteer id,
+    places it does not know fall back to their normalized text ('Goa ', 'GOA!' -> 'goa')"""
+    return get_gazetteer().canonical_key(destination)
+
+
+class MemoryCache:
+    """In-process TTL cache with LRU eviction and hit/miss counters"""
+
+    def __init__(self, namespace: str, ttl_seconds: float, max_entries: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+class SQLiteCache(MemoryCache):
+    """On-disk TTL/LRU cache shared by every process that points at the same file.
+
+    Values are stored as JSON, so only JSON-serializable results should be cached.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, max_entries: int, path: str):
+        super().__init__(namespace, ttl_seconds, max_entries)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, last_access)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    )
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, default=str), now + ttl, now),
+            )
+            self._conn.execute(
+                """DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.namespace, self.namespace, self.max_entries),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["backend"] = "sqlite"
+        return stats
+
+
+class RedisCache(MemoryCache):
+    """Cache on a Redis-compatible server; a sorted set per namespace tracks recency for LRU eviction.
+
+    Values are stored as JSON, like the sqlite backend.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, max_entries: int, url: str):
+        super().__init__(namespace, ttl_seconds, max_entries)
+        self.url = url
+        self._redis = get_redis_client(url)
+        self._prefix = f"ninja:cache:{namespace}:"
+        self._lru_key = f"ninja:cache-lru:{namespace}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._redis.get(self._prefix + key)
+        if value is None:
+            self._redis.zrem(self._lru_key, key)
+            self.misses += 1
+            return None
+        self._redis.zadd(self._lru_key, {key: time.time()})
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        pipe = self._redis.pipeline()
+        pipe.set(self._prefix + key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+        pipe.zadd(self._lru_key, {key: time.time()})
+        pipe.zrange(self._lru_key, 0, -(self.max_entries + 1))
+        evicted = pipe.execute()[-1]
+        if evicted:
+            keys = [k.decode() if isinstance(k, bytes) else k for k in evicted]
+            self._redis.delete(*[self._prefix + k for k in keys])
+            self._redis.zrem(self._lru_key, *keys)
+
+    def clear(self):
+        keys = [k.decode() if isinstance(k, bytes) else k for k in self._redis.zrange(self._lru_key, 0, -1)]
+        if keys:
+            self._redis.delete(*[self._prefix + k for k in keys])
+        self._redis.delete(self._lru_key)
+
+    def __len__(self) -> int:
+        return self._redis.zcard(self._lru_key)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["backend"] = "redis"
+        return stats
+
+
+_caches: Dict[str, MemoryCache] = {}
+_cache_settings: Optional[dict] = None
+_redis_clients: Dict[str, Any] = {}
+
+
+def get_redis_client(url: str):
+    """Process-wide client (with its own connection pool) for a Redis-compatible server"""
+    client = _redis_clients.get(url)
+    if client is None:
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis backend needs the redis package: pip install redis")
+        client = redis.Redis.from_url(url, socket_timeout=5)
+        _redis_clients[url] = client
+    return client
+
+
+def get_cache_settings() -> dict:
+    """Cache settings from config.yaml (`cache` section) merged over defaults"""
+    global _cache_settings
+    if _cache_settings is None:
+        settings = dict(DEFAULT_CACHE_SETTINGS)
+        try:
+            settings.update(load_config().get("cache", {}) or {})
+        except FileNotFoundError:
+            pass
+        _cache_settings = settings
+    return _cache_settings
+
+
+def get_cache(namespace: str) -> MemoryCache:
+    """Return the process-wide cache for a namespace, built from config on first use"""
+    cache = _caches.get(namespace)
+    if cache is None:
+        settings = get_cache_settings()
+        ns_settings = (settings.get("namespaces") or {}).get(namespace, {}) or {}
+        ttl = ns_settings.get("ttl_seconds", settings["default_ttl_seconds"])
+        max_entries = ns_settings.get("max_entries", settings["default_max_entries"])
+        backend = ns_settings.get("backend", settings["backend"])
+        if backend == "sqlite":
+            cache = SQLiteCache(namespace, ttl, max_entries, settings["sqlite_path"])
+        elif backend == "redis":
+            cache = RedisCache(namespace, ttl, max_entries, settings["redis_url"])
+        elif backend == "memory":
+            cache = MemoryCache(namespace, ttl, max_entries)
+        else:
+            raise ValueError(f"Unknown cache backend: {backend}")
+        _caches[namespace] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for every cache created in this process"""
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
+
+
+def cached_call(cache: MemoryCache, key: str, func: Callable[[], Any],
+                should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+    """Return the cached value for key, or call func and cache its result.
+
+    Only results accepted by should_cache are stored (default: non-empty ones), so
+    "nothing found" answers are retried instead of being served for the whole TTL.
+    """
+    value = cache.get(key)
+    if value is None:
+        value = func()
+        if (should_cache or bool)(value):
+            cache.set(key, value)
+    return value
+
+
+async def acached_call(cache: MemoryCache, key: str, coro_func: Callable[[], Any],
+                       should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+    """Async version of cached_call; coro_func returns an awaitable"""
+    value = cache.get(key)
+    if value is None:
+        value = await coro_func()
+        if (should_cache or bool)(value):
+            cache.set(key, value)
+    return value
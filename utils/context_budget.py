@@ -0,0 +1,147 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from utils.config_loader import load_config
+from utils.metrics import record_context_usage
+
+# Budgets are for the upstream agent outputs only; the fixed instructions come on top.
+# llama3-8b-8192 has 8192 tokens of context and we reserve 1500 for the completion.
+DEFAULT_CONTEXT_BUDGETS = {
+    "enabled": True,
+    "itinerary": {"total_tokens": 1800, "weights": {"attractions": 2, "weather": 1, "budget": 1}},
+    "final_synthesis": {"total_tokens": 3200, "weights": {"itinerary": 3, "research": 1, "weather": 1, "budget": 1}},
+}
+
+_EMPHASIS = re.compile(r"\*\*|__|`")
+_RULE = re.compile(r"^\s*(?:[-*_]\s*){3,}$")
+_HEADING = re.compile(r"^\s*(?:#{1,6}\s|\d+\.\s+\S.*:$|[A-Z][^.!?]{0,60}:$)")
+_FACT = re.compile(r"\d|[$€£₹¥%°]")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_FILLER = re.compile(r"^(?:here is|here's|i hope|let me know|feel free|happy travels|enjoy your)", re.IGNORECASE)
+
+
+def count_tokens(text: str) -> int:
+    """Same ~4 characters per token estimate the rate limiter uses"""
+    return (len(text) + 3) // 4
+
+
+def _line_priority(line: str) -> int:
+    if _HEADING.match(line):
+        return 3
+    if _FACT.search(line):
+        return 2
+    if _BULLET.match(line):
+        return 1
+    return 0
+
+
+def compact_text(text: str, max_tokens: int) -> str:
+    """Shrink an agent's markdown to about `max_tokens`, keeping headings and lines with numbers first"""
+    text = text or ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    # Formatting, filler and repeated lines cost tokens without carrying information
+    lines, seen = [], set()
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", _EMPHASIS.sub("", line)).rstrip()
+        # A paragraph on one line would never fit as a whole: rank its sentences instead
+        for piece in (_SENTENCE_END.split(line) if count_tokens(line) >= max_tokens else [line]):
+            key = piece.strip().lower()
+            if key and key not in seen and not _RULE.match(piece) and not _FILLER.match(key):
+                seen.add(key)
+                lines.append(piece)
+    compacted = "\n".join(lines)
+    if count_tokens(compacted) <= max_tokens:
+        return compacted
+
+    # Keep the most informative lines that fit, then restore their original order
+    ranked = sorted(range(len(lines)), key=lambda i: (-_line_priority(lines[i]), i))
+    kept, used = set(), 0
+    for i in ranked:
+        cost = count_tokens(lines[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        kept.add(i)
+        used += cost
+    # A sentence too long for what is left is cut to fit rather than dropped
+    leftover = next((i for i in ranked if i not in kept), None)
+    if leftover is not None and max_tokens - used >= 8:
+        kept.add(leftover)
+        lines[leftover] = lines[leftover][:(max_tokens - used - 3) * 4].rstrip() + " …"
+    return "\n".join(lines[i] for i in sorted(kept)) + "\n[...]"
+
+
+def allocate_budget(sizes: Dict[str, int], total_tokens: int, weights: Dict[str, float]) -> Dict[str, int]:
+    """Split a token budget across sections by weight; sections that need less give the rest back"""
+    remaining = dict(sizes)
+    budget = total_tokens
+    allocation: Dict[str, int] = {}
+    while remaining:
+        weight_sum = sum(weights.get(name, 1) for name in remaining)
+        shares = {name: budget * weights.get(name, 1) / weight_sum for name in remaining}
+        fitting = [name for name, size in remaining.items() if size <= shares[name]]
+        if not fitting:
+            allocation.update({name: int(share) for name, share in shares.items()})
+            break
+        for name in fitting:
+            allocation[name] = remaining.pop(name)
+            budget -= allocation[name]
+    return allocation
+
+
+class ContextBudget:
+    """Per-call token budget for the upstream sections fed into one prompt"""
+
+    def __init__(self, call: str, total_tokens: int, weights: Optional[Dict[str, float]] = None, enabled: bool = True):
+        self.call = call
+        self.total_tokens = total_tokens
+        self.weights = weights or {}
+        self.enabled = enabled
+
+    def fit(self, sections: Dict[str, str]) -> Tuple[Dict[str, str], Dict]:
+        """Compact `sections` to fit the budget; returns (sections, token report)"""
+        sections = {name: str(text or "") for name, text in sections.items()}
+        sizes = {name: count_tokens(text) for name, text in sections.items()}
+        if self.enabled and sum(sizes.values()) > self.total_tokens:
+            allocation = allocate_budget(sizes, self.total_tokens, self.weights)
+            fitted = {name: compact_text(text, allocation[name]) for name, text in sections.items()}
+        else:
+            fitted = sections
+
+        report = {
+            "call": self.call,
+            "budget_tokens": self.total_tokens,
+            "sections": {
+                name: {"before": sizes[name], "after": count_tokens(fitted[name])} for name in sections
+            },
+        }
+        report["tokens_before"] = sum(sizes.values())
+        report["tokens_after"] = sum(section["after"] for section in report["sections"].values())
+        record_context_usage(self.call, report["tokens_before"], report["tokens_after"])
+        if report["tokens_after"] < report["tokens_before"]:
+            print(f"✂️ {self.call} context: {report['tokens_before']} → {report['tokens_after']} tokens")
+        return fitted, report
+
+
+def render_sections(sections: Dict[str, str], titles: Dict[str, str]) -> str:
+    """Labelled markdown blocks instead of a Python dict repr"""
+    blocks: List[str] = []
+    for name, text in sections.items():
+        blocks.append(f"### {titles.get(name, name.title())}\n{text.strip() or 'Not available'}")
+    return "\n\n".join(blocks)
+
+
+def get_context_budget(call: str) -> ContextBudget:
+    settings = dict(DEFAULT_CONTEXT_BUDGETS)
+    try:
+        settings.update(load_config().get("context_budget", {}) or {})
+    except FileNotFoundError:
+        pass
+    call_settings = {**DEFAULT_CONTEXT_BUDGETS.get(call, {}), **(settings.get(call) or {})}
+    return ContextBudget(
+        call,
+        total_tokens=int(call_settings.get("total_tokens", 2000)),
+        weights=call_settings.get("weights"),
+        enabled=settings.get("enabled", True),
+    )
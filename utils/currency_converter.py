@@ -1,16 +1,28 @@
-import requests
+from typing import List, Sequence
+from utils.exchange_rates import get_rate_store
 
 class CurrencyConverter:
     def __init__(self, api_key: str):
-        self.base_url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest/"
+        # Conversions are answered from the shared rate table, which is fetched
+        # at most once per refresh interval instead of once per conversion.
+        self.rate_store = get_rate_store(api_key)
     
     def convert(self, amount:float, from_currency:str, to_currency:str):
         """this will convert my amount from one currency to another :)"""
-        url = f"{self.base_url}/{from_currency}"
-        response = requests.get(url)
-        if response.status_code != 200:
-            raise Exception("API call failed:", response.json())
-        rates = response.json()["conversion_rates"]
-        if to_currency not in rates:
-            raise ValueError(f"{to_currency} not found in exchange rates.")
-        return amount * rates[to_currency]
\ No newline at end of file
+        return self.rate_store.convert(amount, from_currency, to_currency)
+
+    async def aconvert(self, amount:float, from_currency:str, to_currency:str):
+        """Async version of convert that does not block the event loop"""
+        return await self.rate_store.aconvert(amount, from_currency, to_currency)
+
+    def convert_many(self, amounts: Sequence[float], from_currencies, to_currencies) -> List[float]:
+        """Convert a batch of amounts with a single rate-table lookup"""
+        return self.rate_store.convert_many(amounts, from_currencies, to_currencies)
+
+    async def aconvert_many(self, amounts: Sequence[float], from_currencies, to_currencies) -> List[float]:
+        """Async version of convert_many"""
+        return await self.rate_store.aconvert_many(amounts, from_currencies, to_currencies)
+
+    def staleness(self) -> dict:
+        """Age of the rate table used for conversions"""
+        return self.rate_store.staleness()
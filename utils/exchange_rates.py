@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from utils.cache import get_cache
+from utils.config_loader import load_config
+from utils.http_client import get_async_client, get_sync_client
+from utils.metrics import timed_span
+
+Number = Union[int, float]
+
+DEFAULT_RATE_SETTINGS = {
+    "base_currency": "USD",
+    "refresh_interval_seconds": 3600,
+}
+
+
+class ExchangeRateStore:
+    """Holds one exchange-rate table per refresh interval and answers every
+    conversion locally.
+
+    exchangerate-api returns all rates relative to a base currency, so any cross
+    rate A -> B is rates[B] / rates[A]. Pair rates learned from other providers
+    (e.g. Alpha Vantage) can be recorded too and are used while fresh.
+    """
+
+    base_url = "https://v6.exchangerate-api.com"
+
+    def __init__(self, api_key: Optional[str], base_currency: str = "USD", refresh_interval_seconds: float = 3600):
+        self.api_key = api_key
+        self.base_currency = base_currency.upper()
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.rates: Dict[str, float] = {}
+        self.fetched_at: Optional[float] = None
+        self.refresh_count = 0
+        self._pair_rates: Dict[Tuple[str, str], Tuple[float, float, str]] = {}
+        # The table is also written to the shared cache so other workers can reuse it.
+        self._shared_cache = get_cache("exchange_rates")
+        self._sync_lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def _table_path(self) -> str:
+        return f"/v6/{self.api_key}/latest/{self.base_currency}"
+
+    def is_stale(self) -> bool:
+        return self.fetched_at is None or time.time() - self.fetched_at >= self.refresh_interval_seconds
+
+    def _load_table(self, table: dict):
+        self.rates = {code.upper(): float(rate) for code, rate in table["rates"].items()}
+        self.fetched_at = table["fetched_at"]
+
+    def _load_shared_table(self) -> bool:
+        table = self._shared_cache.get(self.base_currency)
+        if table and time.time() - table["fetched_at"] < self.refresh_interval_seconds:
+            self._load_table(table)
+            return True
+        return False
+
+    def _store_table(self, payload: dict):
+        if payload.get("result") not in (None, "success") or "conversion_rates" not in payload:
+            raise Exception("API call failed:", payload)
+        table = {"rates": payload["conversion_rates"], "fetched_at": time.time()}
+        self._load_table(table)
+        self.refresh_count += 1
+        self._shared_cache.set(self.base_currency, table, ttl_seconds=self.refresh_interval_seconds)
+
+    def refresh(self, force: bool = False):
+        """Fetch the base table if it is stale (one network call per interval)"""
+        with self._sync_lock:
+            if not force and (not self.is_stale() or self._load_shared_table()):
+                return
+            with timed_span("tool_call", tool="exchangerate_api"):
+                response = get_sync_client(self.base_url).get(self._table_path)
+            self._store_table(response.json())
+
+    async def arefresh(self, force: bool = False):
+        """Async refresh; concurrent callers share a single in-flight fetch"""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if not force and (not self.is_stale() or self._load_shared_table()):
+                return
+            with timed_span("tool_call", tool="exchangerate_api"):
+                response = await get_async_client(self.base_url).get(self._table_path)
+            self._store_table(response.json())
+
+    def record_pair_rate(self, from_currency: str, to_currency: str, rate: float, source: str):
+        """Remember a pair rate fetched elsewhere so it can be reused until it goes stale"""
+        self._pair_rates[(from_currency.upper(), to_currency.upper())] = (float(rate), time.time(), source)
+
+    def _fresh_pair_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        for pair, invert in (((from_currency, to_currency), False), ((to_currency, from_currency), True)):
+            entry = self._pair_rates.get(pair)
+            if entry and time.time() - entry[1] < self.refresh_interval_seconds:
+                return 1.0 / entry[0] if invert else entry[0]
+        return None
+
+    def cross_rate(self, from_currency: str, to_currency: str) -> float:
+        """Rate for from -> to computed from the cached table (no network)"""
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+        table_fresh = bool(self.rates) and not self.is_stale()
+        if table_fresh and from_currency in self.rates and to_currency in self.rates:
+            return self.rates[to_currency] / self.rates[from_currency]
+        # Currencies the table lacks (e.g. XAU) may still have a recorded pair rate
+        pair_rate = self._fresh_pair_rate(from_currency, to_currency)
+        if pair_rate is not None:
+            return pair_rate
+        if table_fresh:
+            missing = [code for code in (from_currency, to_currency) if code not in self.rates]
+            raise ValueError(f"{', '.join(missing)} not found in exchange rates.")
+        raise LookupError(f"No fresh exchange rate for {from_currency}->{to_currency}")
+
+    def has_rate(self, from_currency: str, to_currency: str) -> bool:
+        try:
+            self.cross_rate(from_currency, to_currency)
+            return True
+        except (LookupError, ValueError):
+            return False
+
+    def _convert_many(self, amounts, from_currencies, to_currencies) -> List[float]:
+        amounts = list(amounts) if isinstance(amounts, (list, tuple)) else [amounts]
+        size = len(amounts)
+        from_list = _broadcast(from_currencies, size)
+        to_list = _broadcast(to_currencies, size)
+        # Resolve each distinct pair once, then apply it to every amount.
+        pair_rates = {pair: self.cross_rate(*pair) for pair in set(zip(from_list, to_list))}
+        return [amount * pair_rates[pair] for amount, pair in zip(amounts, zip(from_list, to_list))]
+
+    def convert(self, amount: Number, from_currency: str, to_currency: str) -> float:
+        self.refresh()
+        return amount * self.cross_rate(from_currency, to_currency)
+
+    def convert_many(self, amounts: Sequence[Number], from_currencies: Union[str, Iterable[str]], to_currencies: Union[str, Iterable[str]]) -> List[float]:
+        """Convert many amounts in one call; currencies may be a single code or one per amount"""
+        self.refresh()
+        return self._convert_many(amounts, from_currencies, to_currencies)
+
+    async def aconvert(self, amount: Number, from_currency: str, to_currency: str) -> float:
+        await self.arefresh()
+        return amount * self.cross_rate(from_currency, to_currency)
+
+    async def aconvert_many(self, amounts: Sequence[Number], from_currencies: Union[str, Iterable[str]], to_currencies: Union[str, Iterable[str]]) -> List[float]:
+        await self.arefresh()
+        return self._convert_many(amounts, from_currencies, to_currencies)
+
+    def staleness(self) -> Dict:
+        """How old the rate table is and when it will be refreshed"""
+        age = None if self.fetched_at is None else round(time.time() - self.fetched_at, 1)
+        return {
+            "base_currency": self.base_currency,
+            "fetched_at": self.fetched_at,
+            "age_seconds": age,
+            "refresh_interval_seconds": self.refresh_interval_seconds,
+            "is_stale": self.is_stale(),
+            "table_refreshes": self.refresh_count,
+            "pair_rates": len(self._pair_rates),
+        }
+
+
+def _broadcast(currencies: Union[str, Iterable[str]], size: int) -> List[str]:
+    if isinstance(currencies, str):
+        return [currencies.upper()] * size
+    currencies = [code.upper() for code in currencies]
+    if len(currencies) != size:
+        raise ValueError("Currency list must have one entry per amount")
+    return currencies
+
+
+_rate_stores: Dict[Optional[str], ExchangeRateStore] = {}
+
+
+def get_rate_store(api_key: Optional[str] = None) -> ExchangeRateStore:
+    """Return the process-wide rate store (shared by the budget agent and LangChain tools)"""
+    api_key = api_key or os.environ.get("EXCHANGE_RATE_API_KEY")
+    store = _rate_stores.get(api_key)
+    if store is None:
+        settings = dict(DEFAULT_RATE_SETTINGS)
+        try:
+            settings.update(load_config().get("exchange_rates", {}) or {})
+        except FileNotFoundError:
+            pass
+        store = ExchangeRateStore(api_key, settings["base_currency"], settings["refresh_interval_seconds"])
+        _rate_stores[api_key] = store
+    return store
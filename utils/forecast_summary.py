@@ -0,0 +1,109 @@
+import datetime
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# OpenWeatherMap /forecast returns 40 three-hourly slots (about 8k tokens as a dict repr).
+# The weather prompt and the weather tool only need one line per day, so the slots are
+# folded into per-day aggregates in a single pass and the best outdoor days derived from them.
+
+# Outdoor-day scoring: comfortable temperatures, little rain, moderate wind
+COMFORT_RANGE_C = (15.0, 30.0)
+WINDY_MS = 10.0
+WET_MM = 5.0
+BEST_DAYS = 3
+
+
+def summarize_forecast(forecast: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per local day: min/max temperature, precipitation, rain chance, max wind and main conditions"""
+    if not forecast or not forecast.get("list"):
+        return []
+    offset = datetime.timedelta(seconds=int((forecast.get("city") or {}).get("timezone", 0) or 0))
+    days: Dict[str, Dict[str, Any]] = {}
+    for slot in forecast["list"]:
+        local = datetime.datetime.fromtimestamp(slot["dt"], datetime.timezone.utc) + offset
+        date = local.strftime("%Y-%m-%d")
+        day = days.get(date)
+        if day is None:
+            day = days[date] = {"temps": [], "precip": 0.0, "pop": 0.0, "wind": 0.0, "conditions": Counter()}
+        main = slot.get("main", {})
+        day["temps"].append(main.get("temp_min", main.get("temp")))
+        day["temps"].append(main.get("temp_max", main.get("temp")))
+        day["precip"] += (slot.get("rain") or {}).get("3h", 0.0) + (slot.get("snow") or {}).get("3h", 0.0)
+        day["pop"] = max(day["pop"], float(slot.get("pop", 0.0) or 0.0))
+        day["wind"] = max(day["wind"], float((slot.get("wind") or {}).get("speed", 0.0) or 0.0))
+        for weather in slot.get("weather") or []:
+            day["conditions"][weather.get("description", "")] += 1
+
+    summary = []
+    for date, day in days.items():
+        temps = [temp for temp in day["temps"] if temp is not None]
+        entry = {
+            "date": date,
+            "temp_min_c": round(min(temps), 1) if temps else None,
+            "temp_max_c": round(max(temps), 1) if temps else None,
+            "precip_mm": round(day["precip"], 1),
+            "rain_probability": round(day["pop"], 2),
+            "wind_max_ms": round(day["wind"], 1),
+            "conditions": day["conditions"].most_common(1)[0][0] if day["conditions"] else "",
+        }
+        entry["outdoor_score"] = outdoor_score(entry)
+        summary.append(entry)
+    return summary
+
+
+def outdoor_score(day: Dict[str, Any]) -> float:
+    """0 (stay in) .. 1 (ideal) for a summarized day"""
+    score = 1.0 - 0.6 * day["rain_probability"] - min(day["precip_mm"] / WET_MM, 1.0) * 0.2
+    low, high = COMFORT_RANGE_C
+    if day["temp_max_c"] is not None and day["temp_max_c"] > high:
+        score -= min((day["temp_max_c"] - high) / 10.0, 1.0) * 0.3
+    if day["temp_min_c"] is not None and day["temp_min_c"] < low:
+        score -= min((low - day["temp_min_c"]) / 15.0, 1.0) * 0.3
+    if day["wind_max_ms"] > WINDY_MS:
+        score -= 0.2
+    return round(max(score, 0.0), 2)
+
+
+def best_outdoor_days(days: List[Dict[str, Any]], limit: int = BEST_DAYS) -> List[str]:
+    """Dates of the highest-scoring days with temperature data, in calendar order"""
+    days = [day for day in days if day["temp_min_c"] is not None]
+    ranked = sorted(days, key=lambda day: (-day["outdoor_score"], day["date"]))[:limit]
+    return sorted(day["date"] for day in ranked)
+
+
+def summarize_current(current: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not current or "main" not in current:
+        return None
+    main = current["main"]
+    description = (current.get("weather") or [{}])[0].get("description", "")
+    wind = (current.get("wind") or {}).get("speed")
+    parts = [f"{main.get('temp')}°C (feels {main.get('feels_like', main.get('temp'))}°C)", description,
+             f"humidity {main.get('humidity')}%"]
+    if wind is not None:
+        parts.append(f"wind {wind} m/s")
+    return ", ".join(part for part in parts if part)
+
+
+def format_day(day: Dict[str, Any]) -> str:
+    if day["temp_min_c"] is None:
+        temperature = "n/a"  # slots without a `main` block
+    else:
+        temperature = f"{day['temp_min_c']:.0f}-{day['temp_max_c']:.0f}°C"
+    return (f"{day['date']}: {temperature}, {day['conditions'] or 'n/a'}, "
+            f"rain {day['rain_probability']:.0%} ({day['precip_mm']} mm), wind up to {day['wind_max_ms']} m/s")
+
+
+def format_weather_brief(current: Optional[Dict[str, Any]], forecast: Optional[Dict[str, Any]]) -> str:
+    """Compact text for prompts and tools: current conditions, one line per day, best outdoor days"""
+    lines = []
+    current_line = summarize_current(current)
+    if current_line:
+        lines.append(f"Current: {current_line}")
+    days = summarize_forecast(forecast)
+    if days:
+        lines.append("Daily forecast (local dates):")
+        lines.extend(f"- {format_day(day)}" for day in days)
+        best = best_outdoor_days(days)
+        if best:
+            lines.append(f"Best outdoor days: {', '.join(best)}")
+    return "\n".join(lines) or "No weather data available"
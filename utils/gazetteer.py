@@ -0,0 +1,152 @@
+import csv
+import re
+import threading
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from utils.config_loader import load_config
+
+# Offline place index loaded once per process from a GeoNames-style TSV. Columns live
+# in flat arrays (one row per place) and every spelling maps to its row in a dict, so
+# resolving "goa india", "North Goa" or "Gurgaon" is a dict lookup or two. The place id
+# becomes the cache key and the coordinates feed OpenWeatherMap lat/lon queries.
+
+DEFAULT_GAZETTEER_SETTINGS = {
+    "path": "data/gazetteer.tsv",
+}
+
+# Longest alias, in words, tried when splitting "paris france" into known places
+MAX_ALIAS_WORDS = 4
+
+
+class Place(NamedTuple):
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    feature_class: str
+    country_code: str
+    population: int
+
+
+def normalize_place_name(text: str) -> str:
+    """Lowercase, drop punctuation and collapse spaces: 'Goa, India!' -> 'goa india'"""
+    key = (text or "").lower()
+    key = re.sub(r"[^\w\s]", " ", key)
+    return re.sub(r"\s+", " ", key).strip()
+
+
+class Gazetteer:
+    """Column-oriented place table with an alias -> row index"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.ids = array("l")
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.populations = array("q")
+        self.names: List[str] = []
+        self.feature_classes: List[str] = []
+        self.country_codes: List[str] = []
+        self.aliases: Dict[str, int] = {}
+        self._rows_by_id: Dict[int, int] = {}
+        if path:
+            self.load(path)
+
+    def load(self, path: str):
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            rows = csv.reader((line for line in file if not line.startswith("#")), delimiter="\t")
+            next(rows, None)  # header
+            for row in rows:
+                if len(row) >= 9:
+                    self._add(row)
+
+    def _add(self, row: List[str]):
+        place_id, name, ascii_name, alternate_names, latitude, longitude, feature_class, country_code, population = row[:9]
+        index = len(self.names)
+        self.ids.append(int(place_id))
+        self.names.append(name)
+        self.latitudes.append(float(latitude))
+        self.longitudes.append(float(longitude))
+        self.feature_classes.append(feature_class)
+        self.country_codes.append(country_code)
+        self.populations.append(int(population or 0))
+        self._rows_by_id[int(place_id)] = index
+        for alias in [name, ascii_name] + alternate_names.split(","):
+            alias = normalize_place_name(alias)
+            current = self.aliases.get(alias)
+            # A spelling shared by two places goes to the bigger one, as GeoNames search does
+            if alias and (current is None or self.populations[current] < self.populations[index]):
+                self.aliases[alias] = index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def place(self, index: int) -> Place:
+        return Place(self.ids[index], self.names[index], self.latitudes[index], self.longitudes[index],
+                     self.feature_classes[index], self.country_codes[index], self.populations[index])
+
+    def get(self, place_id: int) -> Optional[Place]:
+        index = self._rows_by_id.get(place_id)
+        return None if index is None else self.place(index)
+
+    def alias_items(self) -> Iterator[Tuple[str, str]]:
+        """(normalized spelling, canonical name) for every indexed spelling"""
+        for alias, index in self.aliases.items():
+            yield alias, self.names[index]
+
+    def lookup(self, text: str) -> Optional[Place]:
+        """Exact match of the whole text against any spelling"""
+        index = self.aliases.get(normalize_place_name(text))
+        return None if index is None else self.place(index)
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """Place named by free text; 'goa india' or 'Paris, France' resolve to their first place"""
+        key = normalize_place_name(text)
+        index = self.aliases.get(key)
+        if index is None:
+            rows = self._segment(key.split(" "))
+            index = rows[0] if rows else None
+        return None if index is None else self.place(index)
+
+    def _segment(self, words: List[str]) -> Optional[List[int]]:
+        """Split words into consecutive known places, longest first; None if any word is left over"""
+        rows: List[int] = []
+        start = 0
+        while start < len(words):
+            for end in range(min(len(words), start + MAX_ALIAS_WORDS), start, -1):
+                index = self.aliases.get(" ".join(words[start:end]))
+                if index is not None:
+                    rows.append(index)
+                    start = end
+                    break
+            else:
+                return None
+        return rows
+
+    def canonical_key(self, text: str) -> str:
+        """Cache key shared by every spelling of a known place; unknown places key on their normalized name"""
+        place = self.resolve(text)
+        return f"place:{place.id}" if place else normalize_place_name(text)
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer, loaded on first use (empty if the data file is missing)"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                settings = dict(DEFAULT_GAZETTEER_SETTINGS)
+                try:
+                    settings.update(load_config().get("gazetteer", {}) or {})
+                except FileNotFoundError:
+                    pass
+                try:
+                    _gazetteer = Gazetteer(settings["path"])
+                except FileNotFoundError:
+                    print(f"⚠️ Gazetteer {settings['path']} not found, destinations are matched by text only")
+                    _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,109 @@
+import asyncio
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from utils.config_loader import load_config
+
+# Shared, pooled HTTP clients (one per host) so every tool call reuses keep-alive
+# connections instead of opening a new one, and async agents never block the loop.
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_async_client_loops: Dict[str, asyncio.AbstractEventLoop] = {}
+_sync_clients: Dict[str, httpx.Client] = {}
+_blocking_executor: Optional[ThreadPoolExecutor] = None
+_http_settings: Optional[dict] = None
+
+DEFAULT_HTTP_SETTINGS = {
+    "timeout_seconds": 15.0,
+    "connect_timeout_seconds": 5.0,
+    "max_connections_per_host": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry_seconds": 30.0,
+    "blocking_io_workers": 16,
+}
+
+
+def get_http_settings() -> dict:
+    """HTTP pool settings from config.yaml (`http` section) merged over defaults"""
+    global _http_settings
+    if _http_settings is None:
+        settings = dict(DEFAULT_HTTP_SETTINGS)
+        try:
+            settings.update(load_config().get("http", {}) or {})
+        except FileNotFoundError:
+            pass
+        _http_settings = settings
+    return _http_settings
+
+
+def _client_options() -> dict:
+    settings = get_http_settings()
+    return {
+        "timeout": httpx.Timeout(
+            settings["timeout_seconds"], connect=settings["connect_timeout_seconds"]
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings["max_connections_per_host"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry_seconds"],
+        ),
+    }
+
+
+def get_async_client(base_url: str) -> httpx.AsyncClient:
+    """Return the pooled async client for a host, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(base_url)
+    # Connections are bound to the loop that opened them; rebuild for a new loop.
+    if client is None or client.is_closed or _async_client_loops.get(base_url) is not loop:
+        client = httpx.AsyncClient(base_url=base_url, **_client_options())
+        _async_clients[base_url] = client
+        _async_client_loops[base_url] = loop
+    return client
+
+
+def get_sync_client(base_url: str) -> httpx.Client:
+    """Return the pooled blocking client for a host (used by sync LangChain tools)"""
+    client = _sync_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.Client(base_url=base_url, **_client_options())
+        _sync_clients[base_url] = client
+    return client
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking SDK call (Google Places, etc.) on a bounded worker pool"""
+    global _blocking_executor
+    if _blocking_executor is None:
+        _blocking_executor = ThreadPoolExecutor(
+            max_workers=get_http_settings()["blocking_io_workers"],
+            thread_name_prefix="blocking-io",
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, lambda: func(*args, **kwargs))
+
+
+async def warm_up_http_clients(base_urls):
+    """Open a pooled connection to each host (DNS + TLS) before the first request needs it"""
+    async def warm(base_url: str):
+        try:
+            await get_async_client(base_url).head("/")
+        except httpx.HTTPError as e:
+            print(f"⚠️ Could not warm up {base_url}: {e}")
+
+    await asyncio.gather(*(warm(base_url) for base_url in base_urls))
+
+
+async def aclose_http_clients():
+    """Close every pooled client; called on application shutdown"""
+    global _blocking_executor
+    for base_url, client in list(_async_clients.items()):
+        if _async_client_loops.get(base_url) is asyncio.get_running_loop():
+            await client.aclose()
+    _async_clients.clear()
+    _async_client_loops.clear()
+    for client in _sync_clients.values():
+        client.close()
+    _sync_clients.clear()
+    if _blocking_executor is not None:
+        _blocking_executor.shutdown(wait=False)
+        _blocking_executor = None
@@ -0,0 +1,174 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from utils.cache import get_cache
+from utils.config_loader import load_config
+from utils.rate_limiter import AdmissionRejected, RateLimitExceeded
+
+# Planning jobs run in the background on a bounded pool of worker tasks. Job records
+# live in the "jobs" cache namespace, so with the sqlite cache backend every API
+# process can report status and results of jobs run by any other process.
+
+DEFAULT_JOB_SETTINGS = {
+    "workers": 4,
+    "max_queued_jobs": 100,
+}
+
+AGENT_EVENTS = ("agent_started", "agent_completed")
+
+
+class JobProgressSink:
+    """Event sink for one job: turns workflow events into the job's progress fields"""
+
+    def __init__(self, queue: "JobQueue", job: Dict[str, Any]):
+        self.queue = queue
+        self.job = job
+
+    def put_nowait(self, event: Dict[str, Any]):
+        name = event.get("event")
+        if name == "token":
+            # Synthesis tokens are only counted; saving on every token would thrash the store
+            self.job["streamed_chars"] = self.job.get("streamed_chars", 0) + len(event.get("text", ""))
+            return
+        if name in AGENT_EVENTS:
+            self.job["progress"][event["agent"]] = "running" if name == "agent_started" else event.get("status", "completed")
+        elif name == "requirements_parsed":
+            self.job["destination"] = event.get("destination")
+        self.queue.save(self.job)
+
+
+class JobQueue:
+    """Bounded FIFO of planning jobs served by a fixed number of worker tasks.
+
+    `handler(job, sink)` does the work and returns the job's result; `sink` accepts
+    the workflow's progress events.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any], JobProgressSink], Awaitable[Dict[str, Any]]],
+                 settings: Optional[dict] = None):
+        if settings is None:
+            settings = dict(DEFAULT_JOB_SETTINGS)
+            try:
+                settings.update(load_config().get("jobs", {}) or {})
+            except FileNotFoundError:
+                pass
+        self.handler = handler
+        self.workers = int(settings["workers"])
+        self.max_queued_jobs = int(settings["max_queued_jobs"])
+        self.store = get_cache("jobs")
+        self._pending: Deque[str] = deque()
+        self._jobs: Dict[str, Dict[str, Any]] = {}  # queued and running jobs of this process
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _ensure_workers(self):
+        # Created lazily so they bind to the server's running event loop
+        if not self._worker_tasks:
+            self._wakeup = asyncio.Event()
+            self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a planning request and return its job record immediately"""
+        if len(self._pending) >= self.max_queued_jobs:
+            self.rejected += 1
+            raise AdmissionRejected("Job queue is full, please retry shortly", retry_after=10.0)
+        self._ensure_workers()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "request": request,
+            "destination": None,
+            "progress": {},
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        self._jobs[job["job_id"]] = job
+        self._pending.append(job["job_id"])
+        self.save(job)
+        self._wakeup.set()
+        return job
+
+    def save(self, job: Dict[str, Any]):
+        self.store.set(job["job_id"], job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record (local if this process owns it, else from the shared store)"""
+        job = self._jobs.get(job_id) or self.store.get(job_id)
+        if job is not None and job["status"] == "queued" and job_id in self._pending:
+            job = {**job, "queue_position": self._pending.index(job_id) + 1}
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job owned by this process"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return self.store.get(job_id)
+        if job_id in self._pending:
+            self._pending.remove(job_id)
+            self._finish(job, "cancelled")
+        elif job_id in self._running:
+            self._running[job_id].cancel()
+        return job
+
+    def _finish(self, job: Dict[str, Any], status: str, result: Any = None, error: Optional[Dict] = None):
+        job.update(status=status, result=result, error=error, finished_at=time.time())
+        self.save(job)
+        self._jobs.pop(job["job_id"], None)
+
+    async def _worker(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            job = self._jobs[self._pending.popleft()]
+            job.update(status="running", started_at=time.time())
+            self.save(job)
+            task = asyncio.ensure_future(self.handler(job, JobProgressSink(self, job)))
+            self._running[job["job_id"]] = task
+            try:
+                result = await task
+                self.completed += 1
+                self._finish(job, "completed", result=result)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # the worker itself is shutting down
+                self._finish(job, "cancelled")
+            except RateLimitExceeded as e:
+                self.failed += 1
+                self._finish(job, "failed", error={"error": str(e), "retry_after": e.retry_after})
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Job {job['job_id']} failed: {str(e)}")
+                self._finish(job, "failed", error={"error": str(e)})
+            finally:
+                self._running.pop(job["job_id"], None)
+
+    async def aclose(self):
+        """Stop the workers; unfinished jobs are marked cancelled"""
+        for task in self._worker_tasks + list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, *self._running.values(), return_exceptions=True)
+        for job in list(self._jobs.values()):
+            self._finish(job, "cancelled")
+        self._pending.clear()
+        self._worker_tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": len(self._pending),
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,75 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage
+from utils.cache import get_cache
+from utils.config_loader import load_config
+
+DEFAULT_LLM_CACHE_SETTINGS = {
+    "enabled": True,
+    "max_temperature": 0.3,  # only (near-)deterministic calls are worth reusing
+}
+
+
+class LLMCache:
+    """Content-addressed cache for chat completions.
+
+    The key hashes the model name, sampling settings and the serialized messages,
+    so the same prompt from any agent or request maps to the same entry.
+    """
+
+    def __init__(self, settings: Optional[dict] = None):
+        if settings is None:
+            settings = dict(DEFAULT_LLM_CACHE_SETTINGS)
+            try:
+                settings.update(load_config().get("llm_cache", {}) or {})
+            except FileNotFoundError:
+                pass
+        self.settings = settings
+        self.cache = get_cache("llm")
+
+    @staticmethod
+    def model_settings(llm) -> Dict[str, Any]:
+        return {
+            "model": getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__,
+            "temperature": getattr(llm, "temperature", None),
+            "max_tokens": getattr(llm, "max_tokens", None),
+        }
+
+    def is_cacheable(self, llm) -> bool:
+        temperature = getattr(llm, "temperature", None)
+        return self.settings["enabled"] and (temperature is None or temperature <= self.settings["max_temperature"])
+
+    def make_key(self, llm, messages: List[BaseMessage], extra: Optional[Dict[str, Any]] = None) -> str:
+        payload = {
+            **self.model_settings(llm),
+            "messages": [{"type": message.type, "content": message.content} for message in messages],
+            "extra": extra or {},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        return AIMessage(
+            content=entry["content"],
+            response_metadata={**entry.get("response_metadata", {}), "cache_hit": True},
+        )
+
+    def set(self, key: str, response: AIMessage):
+        self.cache.set(key, {
+            "content": response.content,
+            "response_metadata": getattr(response, "response_metadata", {}) or {},
+        })
+
+
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide LLM response cache shared by all agents"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache()
+    return _llm_cache
@@ -0,0 +1,321 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from utils.config_loader import load_config
+from utils.metrics import LLM_ROUTING, record_span, timed_span
+from utils.rate_limiter import RateLimitExceeded, estimate_tokens
+
+# Every agent LLM call goes through a router over the configured providers. The
+# fastest healthy provider goes first; if it has not answered by its usual (p90)
+# latency the next one is started as a hedge and the first answer wins. Providers
+# that keep failing are skipped for a while (circuit breaker) instead of failing plans.
+
+DEFAULT_ROUTING_SETTINGS = {
+    "providers": ["groq", "openai"],
+    "latency_aware": True,
+    "latency_margin": 1.5,
+    "latency_min_samples": 5,
+    "hedging": {
+        "enabled": True,
+        "percentile": 90,
+        "min_samples": 20,
+        "min_delay_seconds": 1.0,
+        "max_delay_seconds": 20.0,
+    },
+    "circuit_breaker": {
+        "failure_threshold": 5,
+        "reset_timeout_seconds": 30,
+    },
+    "agents": {},
+}
+
+
+class ProvidersUnavailable(RateLimitExceeded):
+    """Raised when every provider of a router has its circuit breaker open"""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; after `reset_timeout_seconds` one trial call is let through"""
+
+    def __init__(self, provider: str, failure_threshold: int, reset_timeout_seconds: float):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """Give back a half-open trial that ended without a verdict (cancelled, or our own quota)"""
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"🔌 Circuit open for {self.provider} after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_after": round(self.retry_after(), 1)}
+
+
+class LatencyTracker:
+    """Recent call latencies of one agent on one provider"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+    def mean(self) -> Optional[float]:
+        return sum(self.samples) / len(self.samples) if self.samples else None
+
+
+class Route:
+    """One provider as seen by one agent: its chat model, quota, breaker and latencies"""
+
+    def __init__(self, provider: str, llm, rate_limiter, breaker: CircuitBreaker):
+        self.provider = provider
+        self.llm = llm
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+
+
+class LLMRouter:
+    """Hedged, failover-aware LLM calls for one agent over an ordered list of routes"""
+
+    def __init__(self, agent: str, routes: List[Route], settings: Optional[dict] = None):
+        self.agent = agent
+        self.routes = routes
+        self.settings = settings or get_routing_settings()
+        self.hedging = self.settings["hedging"]
+
+    def candidates(self) -> List[Route]:
+        """Routes worth trying, best first: configured order, unless a backup is clearly faster lately"""
+        healthy = [route for route in self.routes if route.breaker.state != "open"]
+        if not self.settings.get("latency_aware") or len(healthy) < 2:
+            return healthy
+        # Reorder only once every route has a track record; an unused backup is not "fast"
+        min_samples = int(self.settings.get("latency_min_samples", 5))
+        if any(len(route.latency.samples) < min_samples for route in healthy):
+            return healthy
+        margin = float(self.settings.get("latency_margin", 1.5))
+
+        def score(item):
+            index, route = item
+            # The preferred route gets a head start of `margin` per position
+            return route.latency.mean() * (margin ** index), index
+
+        return [route for _, route in sorted(enumerate(healthy), key=score)]
+
+    def hedge_delay(self, route: Route) -> Optional[float]:
+        """How long to wait for `route` before starting a backup (None = never hedge)"""
+        if not self.hedging.get("enabled"):
+            return None
+        observed = None
+        if len(route.latency.samples) >= int(self.hedging["min_samples"]):
+            observed = route.latency.percentile(float(self.hedging["percentile"]))
+        delay = observed if observed is not None else float(self.hedging["max_delay_seconds"])
+        return min(max(delay, float(self.hedging["min_delay_seconds"])), float(self.hedging["max_delay_seconds"]))
+
+    def _unavailable(self) -> ProvidersUnavailable:
+        retry_after = min((route.breaker.retry_after() for route in self.routes), default=1.0)
+        return ProvidersUnavailable(f"No LLM provider available for {self.agent}", retry_after=max(1.0, retry_after))
+
+    @staticmethod
+    def _next_route(remaining: List[Route]) -> Optional[Route]:
+        # Asked lazily: a half-open breaker hands out its single trial call to whoever asks first
+        while remaining:
+            route = remaining.pop(0)
+            if route.breaker.allow():
+                return route
+        return None
+
+    async def _call(self, route: Route, messages: List, request_id: Optional[str]):
+        estimated_tokens = estimate_tokens(messages, getattr(route.llm, "max_tokens", None))
+        reserved = False
+        try:
+            with timed_span("rate_limit_wait", agent=self.agent, provider=route.provider):
+                await route.rate_limiter.acquire(estimated_tokens, request_id)
+            reserved = True
+            started = time.perf_counter()
+            with timed_span("llm_call", agent=self.agent, provider=route.provider):
+                response = await route.llm.ainvoke(messages)
+        except asyncio.CancelledError:
+            route.breaker.release_trial()  # lost a hedge race; says nothing about health
+            if reserved:
+                # Only the winner gets reconciled against real usage; give the loser's tokens back
+                route.rate_limiter.reconcile(estimated_tokens, 0)
+            raise
+        except RateLimitExceeded:
+            route.breaker.release_trial()  # our own quota, not a provider fault
+            raise
+        except Exception:
+            route.breaker.record_failure()
+            LLM_ROUTING.inc(agent=self.agent, provider=route.provider, event="error")
+            raise
+        route.latency.observe(time.perf_counter() - started)
+        route.breaker.record_success()
+        return response, estimated_tokens
+
+    async def ainvoke(self, messages: List, request_id: Optional[str] = None) -> Tuple[Any, Route, int]:
+        """Answer from the first route that succeeds; returns (response, route, estimated tokens)"""
+        remaining = self.candidates()
+        route = self._next_route(remaining)
+        if route is None:
+            raise self._unavailable()
+        pending = {asyncio.ensure_future(self._call(route, messages, request_id)): route}
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                first = next(iter(pending.values()))
+                timeout = self.hedge_delay(first) if remaining and len(pending) == 1 else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than usual: race it against the next provider
+                    route = self._next_route(remaining)
+                    if route is not None:
+                        LLM_ROUTING.inc(agent=self.agent, provider=route.provider, event="hedge")
+                        pending[asyncio.ensure_future(self._call(route, messages, request_id))] = route
+                    continue
+                for task in done:
+                    route = pending.pop(task)
+                    if task.exception() is None:
+                        response, estimated_tokens = task.result()
+                        return response, route, estimated_tokens
+                    last_error = task.exception()
+                    print(f"⚠️ {self.agent}: {route.provider} call failed ({str(last_error)[:80]})")
+                if not pending:
+                    route = self._next_route(remaining)
+                    if route is not None:
+                        LLM_ROUTING.inc(agent=self.agent, provider=route.provider, event="failover")
+                        pending[asyncio.ensure_future(self._call(route, messages, request_id))] = route
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error or self._unavailable()
+
+    async def astream(self, messages: List, request_id: Optional[str] = None) -> AsyncIterator[Tuple[Any, Route, int]]:
+        """Stream chunks from the first route that starts answering; fails over only before the first chunk"""
+        remaining = self.candidates()
+        last_error: Optional[BaseException] = None
+        while True:
+            route = self._next_route(remaining)
+            if route is None:
+                raise last_error or self._unavailable()
+            if last_error is not None:
+                LLM_ROUTING.inc(agent=self.agent, provider=route.provider, event="failover")
+            estimated_tokens = estimate_tokens(messages, getattr(route.llm, "max_tokens", None))
+            streamed = False
+            started = time.perf_counter()
+            try:
+                with timed_span("rate_limit_wait", agent=self.agent, provider=route.provider):
+                    await route.rate_limiter.acquire(estimated_tokens, request_id)
+                started = time.perf_counter()
+                async for chunk in route.llm.astream(messages):
+                    streamed = True
+                    yield chunk, route, estimated_tokens
+            except RateLimitExceeded as e:
+                route.breaker.release_trial()
+                last_error = e
+                continue
+            except Exception as e:
+                route.breaker.record_failure()
+                LLM_ROUTING.inc(agent=self.agent, provider=route.provider, event="error")
+                record_span("llm_call", time.perf_counter() - started, "error", agent=self.agent, provider=route.provider)
+                if streamed:
+                    raise
+                last_error = e
+                print(f"⚠️ {self.agent}: {route.provider} stream failed ({str(e)[:80]})")
+                continue
+            seconds = time.perf_counter() - started
+            route.latency.observe(seconds)
+            route.breaker.record_success()
+            record_span("llm_call", seconds, agent=self.agent, provider=route.provider)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            route.provider: {
+                "model": getattr(route.llm, "model_name", None),
+                "samples": len(route.latency.samples),
+                "p50_ms": round((route.latency.percentile(50) or 0) * 1000, 1),
+                "p90_ms": round((route.latency.percentile(90) or 0) * 1000, 1),
+                "breaker": route.breaker.state,
+            }
+            for route in self.routes
+        }
+
+
+_routing_settings: Optional[dict] = None
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_routing_settings() -> dict:
+    """`llm_routing` section of config.yaml merged over defaults"""
+    global _routing_settings
+    if _routing_settings is None:
+        settings = dict(DEFAULT_ROUTING_SETTINGS)
+        try:
+            configured = load_config().get("llm_routing", {}) or {}
+        except FileNotFoundError:
+            configured = {}
+        for key, value in configured.items():
+            if isinstance(value, dict) and isinstance(settings.get(key), dict):
+                settings[key] = {**settings[key], **value}
+            else:
+                settings[key] = value
+        _routing_settings = settings
+    return _routing_settings
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider: an outage affects every agent using it"""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        settings = get_routing_settings()["circuit_breaker"]
+        breaker = CircuitBreaker(provider, int(settings["failure_threshold"]), float(settings["reset_timeout_seconds"]))
+        _breakers[provider] = breaker
+    return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {provider: breaker.stats() for provider, breaker in _breakers.items()}
@@ -0,0 +1,194 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Minimal Prometheus-style metrics (text exposition format 0.0.4) so the service can be
+# scraped without extra dependencies, plus per-request span traces that can be
+# attached to a /query response.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': repr(bound)})} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(total, 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+STAGE_DURATION = Histogram("ninja_stage_duration_seconds", "Duration of pipeline stages (parse, agents, LLM and tool calls, synthesis, save)")
+STAGE_ERRORS = Counter("ninja_stage_errors_total", "Pipeline stages that raised an exception")
+LLM_TOKENS = Counter("ninja_llm_tokens_total", "LLM tokens reported by the provider, by agent and kind")
+LLM_CALLS = Counter("ninja_llm_calls_total", "LLM calls by agent and outcome (provider or cache_hit)")
+REQUESTS = Counter("ninja_requests_total", "Planning requests by endpoint and status")
+CONTEXT_TOKENS = Counter("ninja_context_tokens_total", "Upstream agent output tokens put into prompts, before and after compaction")
+LLM_ROUTING = Counter("ninja_llm_routing_total", "LLM router events (hedge, failover, error) by agent and provider")
+
+_registry = [STAGE_DURATION, STAGE_ERRORS, LLM_TOKENS, LLM_CALLS, REQUESTS, CONTEXT_TOKENS, LLM_ROUTING]
+_gauge_collectors: List[Callable[[], List[str]]] = []
+
+# Spans of the current request, when a trace is being collected
+_current_trace: ContextVar = ContextVar("metrics_request_trace", default=None)
+
+
+@contextmanager
+def collect_trace():
+    """Collect every span recorded during the block (including child tasks) into a list"""
+    spans: List[Dict] = []
+    token = _current_trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
+
+
+def record_span(stage: str, seconds: float, status: str = "ok", **labels):
+    """Record a finished stage in the histogram, error counter and the current request trace"""
+    STAGE_DURATION.observe(seconds, stage=stage, **labels)
+    if status != "ok":
+        STAGE_ERRORS.inc(stage=stage, **labels)
+    spans = _current_trace.get()
+    if spans is not None:
+        spans.append({"stage": stage, **labels, "duration_ms": round(seconds * 1000, 1), "status": status})
+
+
+@contextmanager
+def timed_span(stage: str, **labels):
+    """Time a stage: feeds the stage histogram, error counter and the current request trace"""
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record_span(stage, time.perf_counter() - start, status, **labels)
+
+
+def record_llm_usage(agent: str, model: str, response) -> Dict[str, int]:
+    """Count tokens from an LLM response's usage metadata; returns the usage dict"""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+            "total_tokens": token_usage.get("total_tokens", 0),
+        }
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.inc(usage[kind], agent=agent, model=model, kind=kind.replace("_tokens", ""))
+    spans = _current_trace.get()
+    if spans is not None and usage.get("total_tokens"):
+        spans.append({"stage": "llm_usage", "agent": agent, "model": model, **usage})
+    return usage
+
+
+def record_context_usage(call: str, tokens_before: int, tokens_after: int):
+    """Count prompt context tokens kept/removed by the context budget for one LLM call"""
+    CONTEXT_TOKENS.inc(tokens_before, call=call, kind="before")
+    CONTEXT_TOKENS.inc(tokens_after, call=call, kind="after")
+    spans = _current_trace.get()
+    if spans is not None:
+        spans.append({"stage": "context_budget", "call": call, "tokens_before": tokens_before, "tokens_after": tokens_after})
+
+
+def register_gauges(collector: Callable[[], List[str]]):
+    """Add a callback that renders point-in-time gauges (cache sizes, queue depth, ...)"""
+    _gauge_collectors.append(collector)
+
+
+def gauge_lines(name: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render one gauge family from (labels, value) samples"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text format"""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collector in _gauge_collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+def summarize_trace(spans: List[Dict]) -> Dict:
+    """Compact per-request view: spans plus total tokens by agent and context tokens saved by call"""
+    tokens: Dict[str, int] = {}
+    saved: Dict[str, int] = {}
+    for span in spans:
+        if span["stage"] == "llm_usage":
+            tokens[span["agent"]] = tokens.get(span["agent"], 0) + span.get("total_tokens", 0)
+        elif span["stage"] == "context_budget":
+            saved[span["call"]] = saved.get(span["call"], 0) + span["tokens_before"] - span["tokens_after"]
+    return {
+        "spans": [span for span in spans if span["stage"] not in ("llm_usage", "context_budget")],
+        "tokens_by_agent": tokens,
+        "context_tokens_saved": saved,
+    }
@@ -1,78 +1,235 @@
+import asyncio
 import os
 import json
-from langchain_tavily import TavilySearch
+from typing import Any, Dict, List, Optional
 from langchain_google_community import GooglePlacesTool, GooglePlacesAPIWrapper 
+from utils.config_loader import load_config
+from utils.http_client import get_async_client, get_sync_client, run_blocking
+from utils.cache import get_cache, normalize_destination_key, cached_call, acached_call
+from utils.metrics import timed_span
 
 class GooglePlaceSearchTool:
+    QUERIES = {
+        "attractions": "top attractive places in and around {place}",
+        "restaurants": "what are the top 10 restaurants and eateries in and around {place}?",
+        "activities": "Activities in and around {place}",
+        "transportation": "What are the different modes of transportations available in {place}",
+    }
+
     def __init__(self, api_key: str):
         self.places_wrapper = GooglePlacesAPIWrapper(gplaces_api_key=api_key)
         self.places_tool = GooglePlacesTool(api_wrapper=self.places_wrapper)
+        self.cache = get_cache("places")
+
+    def _search(self, category: str, place: str):
+        query = self.QUERIES[category].format(place=place)
+
+        def search():
+            with timed_span("tool_call", tool="google_places", category=category):
+                return self.places_tool.run(query)
+
+        return cached_call(self.cache, f"{category}:{normalize_destination_key(place)}", search,
+                           should_cache=self.is_good_result)
+
+    async def _asearch(self, category: str, place: str):
+        # The Google Places SDK is blocking, so cache misses run on the shared
+        # blocking-I/O pool instead of inside the event loop.
+        query = self.QUERIES[category].format(place=place)
+
+        async def search():
+            with timed_span("tool_call", tool="google_places", category=category):
+                return await run_blocking(self.places_tool.run, query)
+
+        return await acached_call(self.cache, f"{category}:{normalize_destination_key(place)}", search,
+                                  should_cache=self.is_good_result)
+
+    async def asearch(self, category: str, place: str):
+        """Async lookup for one category of QUERIES ("attractions", "restaurants", ...)"""
+        return await self._asearch(category, place)
+
+    @staticmethod
+    def is_good_result(result) -> bool:
+        """False for errors and for the tool's "nothing found" answer"""
+        return bool(result) and not str(result).startswith("Google Places did not find")
     
     def google_search_attractions(self, place: str) -> dict:
         """
         Searches for attractions in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"top attractive places in and around {place}")
+        return self._search("attractions", place)
     
     def google_search_restaurants(self, place: str) -> dict:
         """
         Searches for available restaurants in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"what are the top 10 restaurants and eateries in and around {place}?")
+        return self._search("restaurants", place)
     
     def google_search_activity(self, place: str) -> dict:
         """
         Searches for popular activities in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"Activities in and around {place}")
+        return self._search("activities", place)
 
     def google_search_transportation(self, place: str) -> dict:
         """
         Searches for available modes of transportation in the specified place using GooglePlaces API.
         """
-        return self.places_tool.run(f"What are the different modes of transportations available in {place}")
+        return self._search("transportation", place)
+
+    async def agoogle_search_attractions(self, place: str) -> dict:
+        """Async version of google_search_attractions"""
+        return await self._asearch("attractions", place)
+
+    async def agoogle_search_restaurants(self, place: str) -> dict:
+        """Async version of google_search_restaurants"""
+        return await self._asearch("restaurants", place)
+
+    async def agoogle_search_activity(self, place: str) -> dict:
+        """Async version of google_search_activity"""
+        return await self._asearch("activities", place)
+
+    async def agoogle_search_transportation(self, place: str) -> dict:
+        """Async version of google_search_transportation"""
+        return await self._asearch("transportation", place)
+
+DEFAULT_TAVILY_SETTINGS = {
+    "topic": "general",
+    "search_depth": "basic",
+    "max_results": 5,
+    "include_answer": "advanced",
+    "categories": {},  # per-category overrides of the settings above
+}
+
 
 class TavilyPlaceSearchTool:
-    def __init__(self):
-        pass
+    """Tavily /search over the shared pooled HTTP clients (one keep-alive pool for every lookup)"""
+    base_url = "https://api.tavily.com"
+    QUERIES = {
+        "attractions": "top attractive places in and around {place}",
+        "restaurants": "what are the top 10 restaurants and eateries in and around {place}.",
+        "activities": "activities in and around {place}",
+        "transportation": "What are the different modes of transportations available in {place}",
+    }
+
+    def __init__(self, settings: Optional[dict] = None):
+        if settings is None:
+            settings = dict(DEFAULT_TAVILY_SETTINGS)
+            try:
+                settings.update(load_config().get("tavily", {}) or {})
+            except FileNotFoundError:
+                pass
+        self.settings = settings
+        self.api_key = os.getenv("TAVILY_API_KEY")
+        self.cache = get_cache("tavily")
+
+    @staticmethod
+    def _extract_answer(result):
+        if isinstance(result, dict) and result.get("answer"):
+            return result["answer"]
+        return result
+
+    def _params(self, category: str, place: str) -> dict:
+        options = {**self.settings, **((self.settings.get("categories") or {}).get(category) or {})}
+        return {
+            "query": self.QUERIES[category].format(place=place),
+            "topic": options["topic"],
+            "search_depth": options["search_depth"],
+            "max_results": options["max_results"],
+            "include_answer": options["include_answer"],
+        }
+
+    def _headers(self) -> dict:
+        if not self.api_key:
+            raise ValueError("TAVILY_API_KEY is not set")
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    def _cache_key(self, category: str, place: str, params: dict) -> str:
+        # Depth and result count change the answer, so they are part of the key
+        return f"{category}:{params['search_depth']}:{params['max_results']}:{normalize_destination_key(place)}"
+
+    @staticmethod
+    def _check(response) -> dict:
+        if response.status_code != 200:
+            raise ValueError(f"Tavily error {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def _search(self, category: str, place: str):
+        params = self._params(category, place)
+
+        def search():
+            with timed_span("tool_call", tool="tavily", category=category):
+                response = get_sync_client(self.base_url).post("/search", json=params, headers=self._headers())
+            return self._extract_answer(self._check(response))
+
+        return cached_call(self.cache, self._cache_key(category, place, params), search)
+
+    async def _asearch(self, category: str, place: str):
+        params = self._params(category, place)
+
+        async def search():
+            with timed_span("tool_call", tool="tavily", category=category):
+                response = await get_async_client(self.base_url).post("/search", json=params, headers=self._headers())
+            return self._extract_answer(self._check(response))
+
+        return await acached_call(self.cache, self._cache_key(category, place, params), search)
+
+    async def asearch(self, category: str, place: str):
+        """Async lookup for one category of QUERIES ("attractions", "restaurants", ...)"""
+        return await self._asearch(category, place)
+
+    async def abatch_search(self, place: str, categories: Optional[List[str]] = None,
+                            semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+        """Several categories for one place at once, over the same pooled connections.
+
+        A caller's semaphore bounds how many of the searches are in flight together.
+        """
+        categories = categories or list(self.QUERIES)
+
+        async def search(category: str):
+            if semaphore is None:
+                return await self._asearch(category, place)
+            async with semaphore:
+                return await self._asearch(category, place)
+
+        results = await asyncio.gather(*(search(category) for category in categories))
+        return dict(zip(categories, results))
 
     def tavily_search_attractions(self, place: str) -> dict:
         """
         Searches for attractions in the specified place using TavilySearch.
         """
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"top attractive places in and around {place}"})
-        if isinstance(result, dict) and result.get("answer"):
-            return result["answer"]
-        return result
+        return self._search("attractions", place)
     
     def tavily_search_restaurants(self, place: str) -> dict:
         """
         Searches for available restaurants in the specified place using TavilySearch.
         """
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"what are the top 10 restaurants and eateries in and around {place}."})
-        if isinstance(result, dict) and result.get("answer"):
-            return result["answer"]
-        return result
+        return self._search("restaurants", place)
     
     def tavily_search_activity(self, place: str) -> dict:
         """
         Searches for popular activities in the specified place using TavilySearch.
         """
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"activities in and around {place}"})
-        if isinstance(result, dict) and result.get("answer"):
-            return result["answer"]
-        return result
+        return self._search("activities", place)
 
     def tavily_search_transportation(self, place: str) -> dict:
         """
         Searches for available modes of transportation in the specified place using TavilySearch.
         """
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"What are the different modes of transportations available in {place}"})
-        if isinstance(result, dict) and result.get("answer"):
-            return result["answer"]
-        return result
-    
\ No newline at end of file
+        return self._search("transportation", place)
+
+    async def atavily_search_attractions(self, place: str) -> dict:
+        """Async version of tavily_search_attractions"""
+        return await self._asearch("attractions", place)
+
+    async def atavily_search_restaurants(self, place: str) -> dict:
+        """Async version of tavily_search_restaurants"""
+        return await self._asearch("restaurants", place)
+
+    async def atavily_search_activity(self, place: str) -> dict:
+        """Async version of tavily_search_activity"""
+        return await self._asearch("activities", place)
+
+    async def atavily_search_transportation(self, place: str) -> dict:
+        """Async version of tavily_search_transportation"""
+        return await self._asearch("transportation", place)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from utils.cache import get_cache, normalize_destination_key
+from utils.config_loader import load_config
+from utils.query_parser import get_query_parser
+
+DEFAULT_PLAN_CACHE_SETTINGS = {
+    "enabled": True,
+    "near_duplicate_matching": False,
+    "similarity_threshold": 0.85,
+    "embedding_dimensions": 256,
+}
+
+
+def embed_text(text: str, dimensions: int = 256) -> List[float]:
+    """Cheap local embedding: hashed character trigrams, L2-normalized.
+
+    Spots re-worded trip details ("with kids beaches seafood" vs "beaches seafood with
+    kids" scores 0.96, "vegetarian food temples" vs "... temple" 0.94) without calling
+    an embedding API. It does not understand meaning, so it is only ever asked to
+    compare details of the same trip.
+    """
+    text = " " + re.sub(r"\s+", " ", (text or "").lower()).strip() + " "
+    vector = [0.0] * dimensions
+    for i in range(len(text) - 2):
+        digest = hashlib.md5(text[i:i + 3].encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class PlanCache:
+    """Whole-plan cache keyed by the normalized trip requirements.
+
+    The key is the trip (destination, duration, budget level, travelers), the free-text
+    details left in the query once those are taken out ("with kids, beaches") and the
+    model and prompt version, so a prompt or model change never serves plans produced
+    by the old pipeline. Near-duplicate matching reuses a plan for the same trip whose
+    details are worded differently.
+    """
+
+    def __init__(self, settings: Optional[dict] = None):
+        if settings is None:
+            settings = dict(DEFAULT_PLAN_CACHE_SETTINGS)
+            try:
+                settings.update(load_config().get("plan_cache", {}) or {})
+            except FileNotFoundError:
+                pass
+        self.settings = settings
+        self.enabled = settings["enabled"]
+        self.cache = get_cache("plans")
+        # key -> (embedding of the details, model signature, trip fields); bounded by the cache's own size limit
+        self._embeddings: Dict[str, Tuple[List[float], str, Tuple]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def trip_fields(requirements: Dict[str, Any]) -> Tuple[str, int, str, int]:
+        """Normalized destination, duration, budget level and travelers"""
+        return (
+            normalize_destination_key(str(requirements.get("destination", ""))),
+            int(requirements.get("duration", 5)),
+            str(requirements.get("budget_level", "medium")).lower(),
+            int(requirements.get("travelers", 1)),
+        )
+
+    @staticmethod
+    def details(requirements: Dict[str, Any]) -> str:
+        """What the query asks for beyond the trip fields, e.g. "with kids beaches" ("" for a plain request)"""
+        return get_query_parser().remainder(requirements.get("original_query", ""))
+
+    @staticmethod
+    def make_key(requirements: Dict[str, Any], model_signature: str) -> str:
+        """Stable hash of the normalized requirements, their free-text details and the model/prompt signature"""
+        destination, duration, budget_level, travelers = PlanCache.trip_fields(requirements)
+        normalized = {
+            "destination": destination,
+            "duration": duration,
+            "budget_level": budget_level,
+            "travelers": travelers,
+            "details": PlanCache.details(requirements),
+            "model": model_signature,
+        }
+        payload = json.dumps(normalized, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, requirements: Dict[str, Any], model_signature: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Return (cached plan, match type) where match type is 'exact' or 'similar'"""
+        if not self.enabled:
+            return None, None
+        plan = self.cache.get(self.make_key(requirements, model_signature))
+        if plan is not None:
+            return plan, "exact"
+        if not self.settings["near_duplicate_matching"]:
+            return None, None
+        similar_key = self._find_similar(self.details(requirements), model_signature, self.trip_fields(requirements))
+        if similar_key:
+            plan = self.cache.get(similar_key)
+            if plan is not None:
+                return plan, "similar"
+        return None, None
+
+    def set(self, requirements: Dict[str, Any], model_signature: str, plan: Dict):
+        if not self.enabled:
+            return
+        key = self.make_key(requirements, model_signature)
+        self.cache.set(key, plan)
+        if self.settings["near_duplicate_matching"]:
+            embedding = embed_text(self.details(requirements), self.settings["embedding_dimensions"])
+            with self._lock:
+                self._embeddings[key] = (embedding, model_signature, self.trip_fields(requirements))
+                while len(self._embeddings) > self.cache.max_entries:
+                    self._embeddings.pop(next(iter(self._embeddings)))
+
+    def _find_similar(self, details: str, model_signature: str, trip: Tuple) -> Optional[str]:
+        """Same trip and model, differently worded details"""
+        embedding = embed_text(details, self.settings["embedding_dimensions"])
+        best_key, best_score = None, self.settings["similarity_threshold"]
+        with self._lock:
+            candidates = list(self._embeddings.items())
+        for key, (candidate, signature, candidate_trip) in candidates:
+            # Only the details are compared: "Goa" vs "Bali" or 10 vs 12 days are different trips
+            if signature != model_signature or candidate_trip != trip:
+                continue
+            score = cosine_similarity(embedding, candidate)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
@@ -0,0 +1,115 @@
+"""Deterministic final plan: the agents' sections dropped into the synthesis layout.
+
+Used instead of the synthesis LLM call when a request asks for the "template" renderer.
+"""
+import re
+from typing import Dict, List, Optional
+
+RENDERERS = ("llm", "template")
+
+BASE_CHECKLIST = [
+    "Passport/ID and any visa paperwork",
+    "Travel insurance details",
+    "Bookings (stay, transport, tickets) saved offline",
+    "Cards plus some local cash",
+    "Phone charger, power bank and plug adapter",
+    "Basic medicines and prescriptions",
+]
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+_RECOMMENDATION_SECTIONS = re.compile(r"custom|culture|etiquette|safety|tip|warning|consideration|recommend|unique", re.I)
+_PACKING_SECTIONS = re.compile(r"pack|cloth|bring|wear", re.I)
+
+
+def demote_headings(text: str, min_level: int = 3) -> str:
+    """Keep embedded agent headings below the plan's own ## sections"""
+    lines = []
+    for line in (text or "").splitlines():
+        match = _HEADING.match(line)
+        if match and len(match.group(1)) < min_level:
+            line = "#" * min_level + " " + match.group(2)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def extract_items(text: str, section_pattern: "re.Pattern", limit: int = 6, split_lists: bool = False) -> List[str]:
+    """Bullet points under matching section titles, or labelled bullets ("- Safety: ...") with a matching label.
+
+    With `split_lists`, a labelled bullet's comma-separated value becomes one item per entry.
+    """
+    items: List[str] = []
+    in_section = False
+    for line in (text or "").splitlines():
+        stripped = line.strip().replace("**", "")
+        heading = _HEADING.match(stripped)
+        if heading or (stripped.endswith(":") and len(stripped) < 60):
+            title = heading.group(2) if heading else stripped
+            in_section = bool(section_pattern.search(title))
+            continue
+        bullet = _BULLET.match(stripped)
+        if not bullet:
+            continue
+        found: List[str] = []
+        label, colon, value = bullet.group(1).partition(":")
+        if colon and len(label) < 40 and section_pattern.search(label):
+            value = value.strip()
+            found = [part.strip().rstrip(".") for part in value.split(",")] if split_lists else [f"{label.strip()}: {value}"]
+        elif in_section:
+            found = [bullet.group(1)]
+        for item in found:
+            if item and item not in items:
+                items.append(item)
+        if len(items) >= limit:
+            return items[:limit]
+    return items
+
+
+def _bullets(items: List[str], empty: str) -> str:
+    return "\n".join(f"- {item}" for item in items) if items else empty
+
+
+def _recommendations(research: Dict, weather: Dict) -> List[str]:
+    research_structured: Optional[Dict] = research.get("structured")
+    weather_structured: Optional[Dict] = weather.get("structured")
+    items: List[str] = []
+    if research_structured:
+        items += research_structured.get("culture", [])[:3] + research_structured.get("safety", [])[:3]
+        items += research_structured.get("unique_experiences", [])[:2]
+    else:
+        items += extract_items(research.get("research_data", ""), _RECOMMENDATION_SECTIONS)
+    if weather_structured:
+        items += weather_structured.get("warnings", [])[:2]
+    else:
+        items += extract_items(weather.get("weather_analysis", ""), re.compile(r"warning|consideration", re.I), limit=2)
+    return items
+
+
+def _checklist(weather: Dict) -> List[str]:
+    structured: Optional[Dict] = weather.get("structured")
+    if structured:
+        packing = structured.get("packing", [])
+    else:
+        packing = extract_items(weather.get("weather_analysis", ""), _PACKING_SECTIONS, limit=8, split_lists=True)
+    return BASE_CHECKLIST + [f"Pack: {item}" for item in packing]
+
+
+def render_plan(planning_result: Dict) -> str:
+    """Final plan markdown from the agent outputs, with no LLM call"""
+    research = planning_result.get("research", {})
+    weather = planning_result.get("weather", {})
+    budget = planning_result.get("budget", {})
+    itinerary = planning_result.get("itinerary", {})
+    destination = itinerary.get("destination") or research.get("destination") or "your destination"
+    duration = itinerary.get("duration")
+
+    title = f"# Complete Travel Plan: {destination}" + (f" ({duration} days)" if duration else "")
+    sections = [
+        ("📍 Destination Overview", demote_headings(research.get("research_data", "")) or "Research not available."),
+        ("🌤️ Weather Advisory", demote_headings(weather.get("weather_analysis", "")) or "Weather information not available."),
+        ("💰 Budget Overview", demote_headings(budget.get("budget_breakdown", "")) or "Budget estimate not available."),
+        ("📅 Detailed Itinerary", demote_headings(itinerary.get("itinerary", "")) or "Itinerary not available."),
+        ("🎯 Key Recommendations", _bullets(_recommendations(research, weather), "See the sections above.")),
+        ("📋 Travel Checklist", _bullets(_checklist(weather), "")),
+    ]
+    return title + "\n\n" + "\n\n".join(f"## {heading}\n{body}" for heading, body in sections) + "\n"
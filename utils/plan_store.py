@@ -0,0 +1,280 @@
+import asyncio
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from utils.config_loader import load_config
+from utils.http_client import run_blocking
+from utils.save_to_document import save_document
+
+# Finished plans are indexed in SQLite (WAL, so API workers read while one thread writes).
+# Writes go through a single background thread and are never awaited by a request;
+# the plan id is the content hash, so it is known up front and identical plans dedupe.
+
+DEFAULT_PLAN_STORE_SETTINGS = {
+    "enabled": True,
+    "sqlite_path": ".cache/plans.sqlite3",
+    "export_markdown": True,  # also write the classic timestamped file to markdown_directory
+    "markdown_directory": "./output",
+    "page_size": 20,
+    "max_page_size": 100,
+}
+
+SUMMARY_COLUMNS = ("id", "destination", "duration", "query", "model", "latency_ms", "created_at", "markdown_path")
+
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def destination_key(destination: Optional[str]) -> str:
+    """Case/spacing-insensitive destination used for filtering"""
+    return re.sub(r"\s+", " ", (destination or "").strip().lower())
+
+
+def encode_cursor(created_at: float, plan_id: str) -> str:
+    # repr round-trips the stored REAL exactly; a rounded value could repeat the last row
+    return f"{created_at!r}_{plan_id}"
+
+
+def decode_cursor(cursor: str):
+    created_at, _, plan_id = cursor.partition("_")
+    try:
+        return float(created_at), plan_id
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class PlanStore:
+    """Indexed store of generated plans with keyset-paginated listing and full-text search"""
+
+    def __init__(self, settings: Optional[dict] = None):
+        if settings is None:
+            settings = dict(DEFAULT_PLAN_STORE_SETTINGS)
+            try:
+                settings.update(load_config().get("plan_store", {}) or {})
+            except FileNotFoundError:
+                pass
+        self.settings = settings
+        self.enabled = settings.get("enabled", True)
+        self.path = settings["sqlite_path"]
+        self.page_size = int(settings["page_size"])
+        self.max_page_size = int(settings["max_page_size"])
+        self._local = threading.local()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[asyncio.Future] = set()
+        self.saved = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.full_text = False
+        # The database file and schema are created on first use, not at import of the app
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread: the writer thread and the blocking-io readers never share one
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            if not self._schema_ready:
+                with self._schema_lock:
+                    if not self._schema_ready:
+                        self._create_schema(conn)
+                        self._schema_ready = True
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS plans (
+                id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL UNIQUE,
+                destination TEXT,
+                destination_key TEXT,
+                duration INTEGER,
+                query TEXT,
+                model TEXT,
+                latency_ms REAL,
+                created_at REAL NOT NULL,
+                markdown_path TEXT,
+                content TEXT NOT NULL
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_created ON plans (created_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_destination ON plans (destination_key, created_at, id)")
+        try:
+            # External-content index: the text lives once, in `plans`
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS plans_fts USING fts5("
+                "destination, query, content, content='plans', content_rowid='rowid')"
+            )
+            self.full_text = True
+        except sqlite3.OperationalError:
+            print("⚠️ SQLite has no FTS5, plan search falls back to LIKE scans")
+
+    # -- blocking API (runs on worker threads) -------------------------------------------
+
+    def put(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a plan unless identical content is already stored; returns {"id", "duplicate"}"""
+        digest = content_hash(record["content"])
+        plan_id = digest[:16]
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                """INSERT OR IGNORE INTO plans (id, content_hash, destination, destination_key, duration, query,
+                       model, latency_ms, created_at, content)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (plan_id, digest, record.get("destination"), destination_key(record.get("destination")),
+                 record.get("duration"), record.get("query"), record.get("model"), record.get("latency_ms"),
+                 record.get("created_at") or time.time(), record["content"]),
+            )
+            duplicate = cursor.rowcount == 0
+            if not duplicate and self.full_text:
+                conn.execute(
+                    "INSERT INTO plans_fts (rowid, destination, query, content) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, record.get("destination"), record.get("query"), record["content"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if duplicate:
+            self.duplicates += 1
+            return {"id": plan_id, "duplicate": True}
+        self.saved += 1
+        if self.settings.get("export_markdown"):
+            path = save_document(record["content"], record.get("destination"), self.settings["markdown_directory"])
+            if path:
+                conn.execute("UPDATE plans SET markdown_path = ? WHERE id = ?", (path, plan_id))
+        return {"id": plan_id, "duplicate": False}
+
+    def get(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM plans WHERE id = ?", (plan_id,)).fetchone()
+        if row is None:
+            return None
+        plan = self._summary(row)
+        plan["content"] = row["content"]
+        plan["content_hash"] = row["content_hash"]
+        return plan
+
+    def list(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+             destination: Optional[str] = None) -> Dict[str, Any]:
+        """Newest first; pass the returned next_cursor to get the following page"""
+        limit = self._limit(limit)
+        where, params = [], []
+        if destination:
+            where.append("destination_key = ?")
+            params.append(destination_key(destination))
+        if cursor:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        sql = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM plans"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        rows = self._connection().execute(sql, params + [limit + 1]).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return {"items": [self._summary(row) for row in rows], "next_cursor": next_cursor}
+
+    def search(self, text: str, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """Plans matching every word of `text` (destination, query or plan body), best match first"""
+        limit = self._limit(limit)
+        offset = max(0, int(offset))
+        terms = _SEARCH_TERM.findall(text or "")
+        if not terms:
+            return {"items": [], "next_offset": None}
+        columns = ", ".join(f"plans.{column}" for column in SUMMARY_COLUMNS)
+        if self.full_text:
+            match = " ".join(f'"{term}"' for term in terms)
+            sql = (f"SELECT {columns} FROM plans_fts JOIN plans ON plans.rowid = plans_fts.rowid "
+                   "WHERE plans_fts MATCH ? ORDER BY bm25(plans_fts) LIMIT ? OFFSET ?")
+            params: List[Any] = [match]
+        else:
+            sql = (f"SELECT {columns} FROM plans WHERE "
+                   + " AND ".join("(destination LIKE ? OR query LIKE ? OR content LIKE ?)" for _ in terms)
+                   + " ORDER BY created_at DESC LIMIT ? OFFSET ?")
+            params = [f"%{term}%" for term in terms for _ in range(3)]
+        rows = self._connection().execute(sql, params + [limit + 1, offset]).fetchall()
+        next_offset = offset + limit if len(rows) > limit else None
+        return {"items": [self._summary(row) for row in rows[:limit]], "next_offset": next_offset}
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def _limit(self, limit: Optional[int]) -> int:
+        return max(1, min(int(limit or self.page_size), self.max_page_size))
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        summary = {column: row[column] for column in SUMMARY_COLUMNS}
+        summary["created_at"] = datetime.datetime.fromtimestamp(row["created_at"]).isoformat()
+        return summary
+
+    # -- async API ------------------------------------------------------------------------
+
+    def save_in_background(self, record: Dict[str, Any]) -> Optional[str]:
+        """Queue a plan for writing and return its id right away (None when the store is disabled)"""
+        if not self.enabled:
+            return None
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan-store")
+        record = {**record, "created_at": record.get("created_at") or time.time()}
+        future = asyncio.get_running_loop().run_in_executor(self._writer, self.put, record)
+        self._pending.add(future)
+        future.add_done_callback(self._write_done)
+        return content_hash(record["content"])[:16]
+
+    def _write_done(self, future: asyncio.Future):
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.failed += 1
+            print(f"❌ Error saving plan: {error}")
+        elif not future.result()["duplicate"]:
+            print(f"📄 Travel Plan stored as: {future.result()['id']}")
+
+    async def aget(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        return await run_blocking(self.get, plan_id)
+
+    async def alist(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                    destination: Optional[str] = None) -> Dict[str, Any]:
+        return await run_blocking(self.list, limit, cursor, destination)
+
+    async def asearch(self, text: str, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        return await run_blocking(self.search, text, limit, offset)
+
+    async def aclose(self):
+        """Finish queued writes; called on application shutdown"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending_writes": len(self._pending),
+            "saved": self.saved,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "full_text_search": self.full_text,
+        }
@@ -0,0 +1,241 @@
+"""Single-pass travel query parser shared by the API and the coordinator.
+
+The query is tokenized once; a word trie over the offline gazetteer finds the destination
+while the same walk picks up duration, travelers and budget level. Precompiled
+patterns only run when the gazetteer has no match.
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from utils.gazetteer import Gazetteer, get_gazetteer
+
+DEFAULT_DURATION = 5
+DEFAULT_BUDGET_LEVEL = "medium"
+DEFAULT_TRAVELERS = 1
+UNKNOWN_DESTINATION = "Unknown"
+
+# Short aliases that are also ordinary English words: only trusted right after a cue word
+AMBIGUOUS_ALIASES = {"us", "la", "kl", "rio", "nice", "uk"}
+
+DESTINATION_CUES = {"to", "in", "visit", "visiting", "explore", "exploring", "at", "around"}
+ORIGIN_CUES = {"from", "leaving", "departing"}
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "twenty": 20, "thirty": 30,
+}
+DURATION_UNITS = {"day": 1, "days": 1, "night": 1, "nights": 1, "week": 7, "weeks": 7}
+TRAVELER_NOUNS = {"people", "persons", "travelers", "travellers", "pax", "friends", "guests", "members"}
+# "2 adults and 1 child" adds up
+PARTY_NOUNS = {"adult", "adults", "kid", "kids", "child", "children", "teens", "seniors"}
+PAIR_WORDS = {"couple", "honeymoon", "wife", "husband", "partner", "girlfriend", "boyfriend", "spouse"}
+SOLO_WORDS = {"solo", "alone", "myself"}
+BUDGET_WORDS = {
+    "budget": "low", "cheap": "low", "affordable": "low", "backpacking": "low", "backpacker": "low",
+    "shoestring": "low", "economical": "low", "inexpensive": "low",
+    "moderate": "medium", "midrange": "medium", "mid-range": "medium",
+    "luxury": "high", "luxurious": "high", "premium": "high", "upscale": "high", "lavish": "high",
+    "five-star": "high", "5-star": "high",
+}
+
+# How much each destination source is trusted; a stated duration adds DURATION_CONFIDENCE
+DESTINATION_CONFIDENCE = {"gazetteer": 0.7, "pattern": 0.45, "capitalized": 0.2, None: 0.0}
+DURATION_CONFIDENCE = 0.3
+
+# Request wording that says nothing about what the traveller wants from the trip
+_FILLER_WORDS = {
+    "plan", "planning", "trip", "travel", "travelling", "traveling", "holiday", "holidays", "vacation",
+    "itinerary", "i", "i'm", "im", "we", "we're", "me", "my", "our", "want", "wanna", "would", "like", "please",
+    "can", "you", "help", "make", "create", "suggest", "a", "an", "the", "for", "of", "and", "on", "go",
+    "going", "this", "next", "some", "what", "do", "is", "are", "be", "weekend", "fortnight", "budget",
+}
+_TRIP_WORDS = (
+    set(NUMBER_WORDS) | set(DURATION_UNITS) | TRAVELER_NOUNS | set(BUDGET_WORDS)
+    | DESTINATION_CUES | ORIGIN_CUES | _FILLER_WORDS
+)
+
+_TOKEN = re.compile(r"\d+|[a-z]+(?:['-][a-z0-9]+)*")
+
+# The old nine destination regexes, folded into two precompiled patterns
+_CUED_PLACE = re.compile(
+    r"\b(?:to|in|at|visit(?:ing)?|explor(?:e|ing))\s+"
+    r"(?P<place>[a-z][a-z ]*?)"
+    r"(?=\s+(?:for|with|on|during|this|next|from|in|and|under|within)\b|\s*\d|\s*[,.!?]|$)"
+)
+_CUE_SPLIT = re.compile(r"\b(?:to|in|at|visit(?:ing)?|explor(?:e|ing))\s+")
+_LEADING_PLACE = re.compile(r"^(?P<place>[a-z][a-z ]*?)\s+(?:for|in)\s+\d+\s*(?:-\s*)?days?\b")
+_NOT_A_PLACE = {
+    "plan", "trip", "travel", "day", "days", "week", "weeks", "the", "a", "an", "my", "our",
+    "me", "us", "it", "there", "here", "budget", "family", "summer", "winter", "december",
+    "visit", "go", "for", "and", "and the", "i", "want", "like", "would", "do", "see", "eat",
+    "stay", "know", "travel to", "get", "spend",
+}
+_CAPITALIZED_STOPWORDS = {
+    "plan", "trip", "day", "days", "for", "the", "and", "i", "i'm", "please", "can", "help",
+    "where", "what", "which", "how", "when", "suggest", "recommend",
+}
+
+_END = "\0"
+
+
+class QueryParser:
+    """Gazetteer trie + single token walk over a travel query"""
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None):
+        self.trie: Dict[str, Any] = {}
+        for name, canonical in (gazetteer or get_gazetteer()).alias_items():
+            self._insert(name, canonical)
+
+    def _insert(self, name: str, canonical: str):
+        node = self.trie
+        for token in _TOKEN.findall(name):
+            node = node.setdefault(token, {})
+        node[_END] = (canonical, name)
+
+    def _longest_match(self, tokens: List[str], start: int) -> Optional[Tuple[int, str, str]]:
+        """Longest gazetteer entry starting at tokens[start] -> (end index, canonical, alias)"""
+        node = self.trie
+        best = None
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _END in node:
+                best = (i + 1,) + node[_END]
+        return best
+
+    def parse(self, query: str) -> Dict[str, Any]:
+        """Destination, duration, travelers and budget level from one walk over the query"""
+        text = (query or "").strip()
+        tokens = _TOKEN.findall(text.lower())
+
+        places: List[Tuple[int, int, str]] = []  # (priority, position, canonical)
+        duration = None
+        travelers = None
+        budget_level = None
+        party = 0
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            previous = tokens[i - 1] if i else ""
+
+            match = self._longest_match(tokens, i)
+            if match:
+                end, canonical, alias = match
+                cued = previous in DESTINATION_CUES
+                if alias not in AMBIGUOUS_ALIASES or cued:
+                    priority = 0 if cued else (2 if previous in ORIGIN_CUES else 1)
+                    places.append((priority, i, canonical))
+                    i = end
+                    continue
+
+            count = int(token) if token.isdigit() else NUMBER_WORDS.get(token)
+            following = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if count is not None and following in DURATION_UNITS and duration is None:
+                duration = count * DURATION_UNITS[following] + (1 if following.startswith("night") else 0)
+                i += 2
+                continue
+            if count is not None and token not in ("a", "an"):
+                if following in PARTY_NOUNS:
+                    party += count
+                elif travelers is None and (
+                    following in TRAVELER_NOUNS
+                    or (following == "of" and i + 2 < len(tokens) and tokens[i + 2] == "us")
+                    or (previous == "of" and i >= 2 and tokens[i - 2] in ("family", "group", "party"))
+                ):
+                    travelers = count
+            if token == "weekend" and duration is None:
+                duration = 2
+            elif token == "fortnight" and duration is None:
+                duration = 14
+            elif token in PAIR_WORDS and travelers is None:
+                travelers = 2
+            elif token in SOLO_WORDS and travelers is None:
+                travelers = 1
+            elif token in BUDGET_WORDS and budget_level is None:
+                # "budget of 2000" is an amount, not a travel style
+                if not (token == "budget" and (following in ("of", "is", "around", "under") or following.isdigit())):
+                    budget_level = BUDGET_WORDS[token]
+            i += 1
+
+        travelers = travelers or party or None
+        destination, destination_source = None, None
+        if places:
+            destination, destination_source = min(places)[2], "gazetteer"
+        else:
+            destination = self._pattern_destination(text)
+            destination_source = "pattern" if destination else None
+            if not destination:
+                destination = self._capitalized_destination(text)
+                destination_source = "capitalized" if destination else None
+
+        return {
+            "original_query": query,
+            "destination": destination or UNKNOWN_DESTINATION,
+            "duration": duration or DEFAULT_DURATION,
+            "budget_level": budget_level or DEFAULT_BUDGET_LEVEL,
+            "travelers": travelers or DEFAULT_TRAVELERS,
+            "confidence": round(DESTINATION_CONFIDENCE[destination_source] + (DURATION_CONFIDENCE if duration else 0.0), 2),
+            "parsed_fields": {
+                "destination": destination_source,
+                "duration": duration is not None,
+                "travelers": travelers is not None,
+                "budget_level": budget_level is not None,
+            },
+        }
+
+    def remainder(self, query: str) -> str:
+        """The query minus places, numbers, trip wording and filler: "beaches and seafood with kids" -> "beaches seafood with kids" """
+        tokens = _TOKEN.findall((query or "").lower())
+        words = []
+        i = 0
+        while i < len(tokens):
+            match = self._longest_match(tokens, i)
+            if match:
+                i = match[0]
+                continue
+            if not tokens[i].isdigit() and tokens[i] not in _TRIP_WORDS:
+                words.append(tokens[i])
+            i += 1
+        return " ".join(words)
+
+    @staticmethod
+    def _pattern_destination(text: str) -> Optional[str]:
+        lowered = text.lower()
+        for match in _CUED_PLACE.finditer(lowered):
+            # "to travel to tbilisi": keep what follows the last cue
+            place = _CUE_SPLIT.split(re.sub(r"\s+", " ", match.group("place")))[-1].strip()
+            if place not in _NOT_A_PLACE:
+                return place.title()
+        match = _LEADING_PLACE.match(lowered)
+        if match and match.group("place").strip() not in _NOT_A_PLACE:
+            return re.sub(r"\s+", " ", match.group("place")).strip().title()
+        return None
+
+    @staticmethod
+    def _capitalized_destination(text: str) -> Optional[str]:
+        for word in text.split():
+            word = word.strip(",.!?")
+            if len(word) > 2 and word[0].isupper() and word.lower() not in _CAPITALIZED_STOPWORDS:
+                return word
+        return None
+
+
+_parser: Optional[QueryParser] = None
+_parser_lock = threading.Lock()
+
+
+def get_query_parser() -> QueryParser:
+    """Process-wide parser (the gazetteer trie is built once)"""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = QueryParser()
+    return _parser
+
+
+def parse_travel_query(query: str) -> Dict[str, Any]:
+    return get_query_parser().parse(query)
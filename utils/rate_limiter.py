@@ -0,0 +1,436 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Tuple
+from utils.config_loader import load_config
+
+# Provider quotas are per API key, not per process. With several API workers set
+# `rate_limits.backend` to "sqlite" (one box) or "redis" so they draw on one budget.
+
+DEFAULT_RATE_LIMITS = {
+    "backend": "memory",
+    "groq": {"requests_per_minute": 30, "tokens_per_minute": 30000},
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 200000},
+    "max_queue": 200,
+    "max_wait_seconds": 60,
+}
+
+DEFAULT_ADMISSION = {
+    "max_concurrent_requests": 8,
+    "max_queued_requests": 32,
+    "max_wait_seconds": 30,
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an LLM call cannot get provider quota within the allowed wait"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionRejected(RateLimitExceeded):
+    """Raised when the server is already running and queueing as many requests as allowed"""
+
+
+def estimate_tokens(messages: Iterable, max_tokens: Optional[int] = None) -> int:
+    """Rough token cost of a chat call: ~4 characters per prompt token plus the completion budget"""
+    prompt_chars = sum(len(str(getattr(message, "content", message))) for message in messages)
+    return prompt_chars // 4 + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` and refills continuously"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 when they already are)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class LocalQuota:
+    """Request and token buckets for one provider, private to this process"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+
+    def wait_time(self, tokens: int) -> float:
+        return max(self.request_bucket.time_until(1), self.token_bucket.time_until(tokens))
+
+    def try_acquire(self, tokens: int) -> float:
+        """Take quota for one call if it is available now; otherwise return the seconds to wait"""
+        delay = self.wait_time(tokens)
+        if delay == 0:
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(tokens)
+        return delay
+
+    def refund(self, tokens: int):
+        self.token_bucket.refund(tokens)
+
+    def available(self) -> Tuple[float, float]:
+        self.request_bucket._refill()
+        self.token_bucket._refill()
+        return self.request_bucket.tokens, self.token_bucket.tokens
+
+
+class SharedQuota(ABC):
+    """Same buckets, kept in a store every worker process can see and updated atomically there"""
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float):
+        self.provider = provider
+        self.capacities = (float(requests_per_minute), float(tokens_per_minute))
+        self.rates = (requests_per_minute / 60.0, tokens_per_minute / 60.0)
+
+    @abstractmethod
+    def _transact(self, mode: str, tokens: int) -> Tuple[float, float, float]:
+        """Refill both buckets, then "peek", "acquire" or "refund"; returns (wait, requests, tokens)"""
+
+    def _step(self, levels, updated, now: float, mode: str, tokens: int) -> Tuple[float, list]:
+        amounts = (1, tokens)
+        levels = [
+            min(cap, level + max(0.0, now - stamp) * rate)
+            for level, stamp, cap, rate in zip(levels, updated, self.capacities, self.rates)
+        ]
+        wait = max(
+            (min(amount, cap) - level) / rate if level < min(amount, cap) else 0.0
+            for level, amount, cap, rate in zip(levels, amounts, self.capacities, self.rates)
+        )
+        if mode == "acquire" and wait == 0:
+            levels = [level - min(amount, cap) for level, amount, cap in zip(levels, amounts, self.capacities)]
+        elif mode == "refund":
+            levels[1] = min(self.capacities[1], levels[1] + tokens)
+        return wait, levels
+
+    def wait_time(self, tokens: int) -> float:
+        return self._transact("peek", tokens)[0]
+
+    def try_acquire(self, tokens: int) -> float:
+        return self._transact("acquire", tokens)[0]
+
+    def refund(self, tokens: int):
+        self._transact("refund", tokens)
+
+    def available(self) -> Tuple[float, float]:
+        _, requests, tokens = self._transact("peek", 0)
+        return requests, tokens
+
+
+class SQLiteQuota(SharedQuota):
+    """Buckets in a SQLite table; BEGIN IMMEDIATE serialises updates across processes"""
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float, path: str):
+        super().__init__(provider, requests_per_minute, tokens_per_minute)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                name TEXT PRIMARY KEY,
+                level REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._names = (f"{provider}:requests", f"{provider}:tokens")
+        self._lock = threading.Lock()
+
+    def _transact(self, mode: str, tokens: int) -> Tuple[float, float, float]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = dict(
+                    (name, (level, updated)) for name, level, updated in self._conn.execute(
+                        "SELECT name, level, updated_at FROM rate_limit_buckets WHERE name IN (?, ?)", self._names
+                    )
+                )
+                levels = [rows.get(name, (cap, now))[0] for name, cap in zip(self._names, self.capacities)]
+                updated = [rows.get(name, (0, now))[1] for name in self._names]
+                wait, levels = self._step(levels, updated, now, mode, tokens)
+                if mode != "peek":
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO rate_limit_buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                        [(name, level, now) for name, level in zip(self._names, levels)],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait, levels[0], levels[1]
+
+
+# Same arithmetic as SharedQuota._step, run atomically inside Redis
+_REDIS_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local mode = ARGV[2]
+local amounts = {1, tonumber(ARGV[3])}
+local caps = {tonumber(ARGV[4]), tonumber(ARGV[5])}
+local rates = {caps[1] / 60, caps[2] / 60}
+local levels = {}
+local wait = 0
+for i = 1, 2 do
+  local state = redis.call('HMGET', KEYS[i], 'level', 'updated_at')
+  local level = tonumber(state[1]) or caps[i]
+  local updated = tonumber(state[2]) or now
+  level = math.min(caps[i], level + math.max(0, now - updated) * rates[i])
+  levels[i] = level
+  local need = math.min(amounts[i], caps[i])
+  if level < need then wait = math.max(wait, (need - level) / rates[i]) end
+end
+if mode == 'acquire' and wait == 0 then
+  for i = 1, 2 do levels[i] = levels[i] - math.min(amounts[i], caps[i]) end
+elseif mode == 'refund' then
+  levels[2] = math.min(caps[2], levels[2] + amounts[2])
+end
+if mode ~= 'peek' then
+  for i = 1, 2 do
+    redis.call('HSET', KEYS[i], 'level', tostring(levels[i]), 'updated_at', tostring(now))
+    redis.call('EXPIRE', KEYS[i], 3600)
+  end
+end
+return {tostring(wait), tostring(levels[1]), tostring(levels[2])}
+"""
+
+
+class RedisQuota(SharedQuota):
+    """Buckets in a Redis-compatible server, updated by a Lua script"""
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float, url: str):
+        super().__init__(provider, requests_per_minute, tokens_per_minute)
+        from utils.cache import get_redis_client
+        self._script = get_redis_client(url).register_script(_REDIS_BUCKET_SCRIPT)
+        self._keys = [f"ninja:rate-limit:{provider}:requests", f"ninja:rate-limit:{provider}:tokens"]
+
+    def _transact(self, mode: str, tokens: int) -> Tuple[float, float, float]:
+        result = self._script(keys=self._keys, args=[time.time(), mode, tokens, *self.capacities])
+        wait, requests, tokens_left = (float(value) for value in result)
+        return wait, requests, tokens_left
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute budget for one LLM provider.
+
+    Shared by every agent in the process (and, with a shared `quota`, by every
+    worker process). When quota is short, calls wait in a bounded queue that is
+    served round-robin across requests, so one large plan cannot starve the others.
+    """
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float,
+                 max_queue: int = 200, max_wait_seconds: float = 60, quota=None):
+        self.provider = provider
+        self.quota = quota or LocalQuota(requests_per_minute, tokens_per_minute)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._waiters: "OrderedDict[str, deque]" = OrderedDict()
+        self._queued = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.rejected = 0
+
+    def _wait_time(self, tokens: int) -> float:
+        return self.quota.wait_time(tokens)
+
+    async def acquire(self, tokens: int, request_id: Optional[str] = None):
+        """Wait for quota for one call of `tokens` estimated tokens"""
+        if not self._queued and self.quota.try_acquire(tokens) == 0:
+            self.granted += 1
+            return
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise RateLimitExceeded(f"{self.provider} rate-limit queue is full", retry_after=self._wait_time(tokens) or 1.0)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(request_id or "anonymous", deque()).append((waiter, tokens))
+        self._queued += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            waiter.cancel()
+            self.rejected += 1
+            raise RateLimitExceeded(f"Timed out waiting for {self.provider} quota", retry_after=self._wait_time(tokens) or 1.0)
+        except asyncio.CancelledError:
+            waiter.cancel()
+            raise
+
+    def _next_waiter(self):
+        """Pop the next live waiter, rotating between requests (round-robin)"""
+        while self._waiters:
+            request_id, queue = next(iter(self._waiters.items()))
+            waiter, tokens = queue.popleft()
+            self._queued -= 1
+            del self._waiters[request_id]
+            if queue:
+                self._waiters[request_id] = queue  # back of the line
+            if not waiter.done():
+                return waiter, tokens
+        return None, 0
+
+    async def _dispatch(self):
+        while True:
+            waiter, tokens = self._next_waiter()
+            if waiter is None:
+                return
+            # Other worker processes may take shared quota while we sleep, so re-check each time
+            while not waiter.done():  # done = gave up while we were waiting for quota
+                delay = self.quota.try_acquire(tokens)
+                if delay == 0:
+                    self.granted += 1
+                    waiter.set_result(True)
+                    break
+                await asyncio.sleep(delay)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Give back tokens that were reserved but not used by the provider"""
+        if actual_tokens is not None and actual_tokens < estimated_tokens:
+            self.quota.refund(estimated_tokens - actual_tokens)
+
+    def stats(self) -> Dict:
+        requests_available, tokens_available = self.quota.available()
+        return {
+            "provider": self.provider,
+            "backend": type(self.quota).__name__.replace("Quota", "").lower(),
+            "queued": self._queued,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "requests_available": round(requests_available, 2),
+            "tokens_available": round(tokens_available, 1),
+        }
+
+
+class AdmissionController:
+    """Caps how many planning requests run at once; the rest wait in a bounded FIFO queue"""
+
+    def __init__(self, max_concurrent_requests: int, max_queued_requests: int, max_wait_seconds: float):
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_queued_requests = max_queued_requests
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one execution slot for the duration of a request"""
+        if self._semaphore is None:
+            # Created lazily so it binds to the server's running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        if self._semaphore.locked() and self.waiting >= self.max_queued_requests:
+            self.rejected += 1
+            raise AdmissionRejected("Too many planning requests in progress, please retry shortly", retry_after=5.0)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected("Timed out waiting for a free planning slot", retry_after=5.0)
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrent_requests": self.max_concurrent_requests,
+        }
+
+
+_rate_limiters: Dict[str, ProviderRateLimiter] = {}
+_admission_controller: Optional[AdmissionController] = None
+
+
+def _load_section(name: str, defaults: dict) -> dict:
+    settings = dict(defaults)
+    try:
+        settings.update(load_config().get(name, {}) or {})
+    except FileNotFoundError:
+        pass
+    return settings
+
+
+def _build_quota(provider: str, quota: dict, backend: str):
+    if backend == "memory":
+        return None  # ProviderRateLimiter's default LocalQuota
+    from utils.cache import get_cache_settings
+    cache_settings = get_cache_settings()
+    if backend == "sqlite":
+        return SQLiteQuota(provider, quota["requests_per_minute"], quota["tokens_per_minute"], cache_settings["sqlite_path"])
+    if backend == "redis":
+        return RedisQuota(provider, quota["requests_per_minute"], quota["tokens_per_minute"], cache_settings["redis_url"])
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Return the process-wide limiter for an LLM provider"""
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        settings = _load_section("rate_limits", DEFAULT_RATE_LIMITS)
+        quota = settings.get(provider) or DEFAULT_RATE_LIMITS.get(provider) or DEFAULT_RATE_LIMITS["groq"]
+        limiter = ProviderRateLimiter(
+            provider,
+            quota["requests_per_minute"],
+            quota["tokens_per_minute"],
+            max_queue=settings["max_queue"],
+            max_wait_seconds=settings["max_wait_seconds"],
+            quota=_build_quota(provider, quota, settings["backend"]),
+        )
+        _rate_limiters[provider] = limiter
+    return limiter
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide request admission controller"""
+    global _admission_controller
+    if _admission_controller is None:
+        settings = _load_section("admission", DEFAULT_ADMISSION)
+        _admission_controller = AdmissionController(
+            settings["max_concurrent_requests"],
+            settings["max_queued_requests"],
+            settings["max_wait_seconds"],
+        )
+    return _admission_controller
+
+
+def rate_limit_stats() -> Dict:
+    """Current limiter and admission counters for health/metrics endpoints"""
+    return {
+        "providers": {provider: limiter.stats() for provider, limiter in _rate_limiters.items()},
+        "admission": get_admission_controller().stats(),
+    }
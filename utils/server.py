@@ -0,0 +1,77 @@
+import inspect
+import os
+from typing import List
+from utils.config_loader import load_config
+
+# Serving settings shared by `python main.py` (uvicorn) and gunicorn.conf.py. Each
+# worker is a separate process with its own agent pool and event loop; caches and
+# provider quotas are only shared between them with the sqlite or redis backends.
+
+DEFAULT_SERVER_SETTINGS = {
+    "host": "0.0.0.0",
+    "port": 8000,
+    "workers": 1,  # or "auto" for one per CPU core
+    "timeout_seconds": 180,
+    "graceful_timeout_seconds": 30,
+    "keepalive_seconds": 5,
+    "startup_timeout_seconds": 60,
+    "warm_up_providers": ["groq"],
+    "warm_up_hosts": [],
+}
+
+
+def get_server_settings() -> dict:
+    """`server` section of config.yaml merged over defaults, with `workers` resolved to a number"""
+    settings = dict(DEFAULT_SERVER_SETTINGS)
+    try:
+        settings.update(load_config().get("server", {}) or {})
+    except FileNotFoundError:
+        pass
+    if str(settings["workers"]).lower() == "auto":
+        settings["workers"] = os.cpu_count() or 1
+    settings["workers"] = max(1, int(settings["workers"]))
+    return settings
+
+
+def shared_state_warnings(workers: int) -> List[str]:
+    """Settings that silently stop being global once there is more than one worker"""
+    if workers <= 1:
+        return []
+    try:
+        config = load_config()
+    except FileNotFoundError:
+        config = {}
+    warnings = []
+    cache = config.get("cache", {}) or {}
+    per_process = [
+        name for name, ns in (cache.get("namespaces") or {}).items()
+        if (ns or {}).get("backend", cache.get("backend", "memory")) == "memory"
+    ]
+    if cache.get("backend", "memory") == "memory" or per_process:
+        warnings.append(f"cache namespaces {per_process or 'all'} use the per-process memory backend")
+    if (config.get("rate_limits", {}) or {}).get("backend", "memory") == "memory":
+        warnings.append(f"rate_limits use the memory backend, so each of the {workers} workers gets the full provider quota")
+    return warnings
+
+
+def run_server():
+    """Serve main:app with uvicorn, using as many worker processes as configured"""
+    import uvicorn
+
+    settings = get_server_settings()
+    for warning in shared_state_warnings(settings["workers"]):
+        print(f"⚠️ {warning}")
+    print(f"🚀 Starting {settings['workers']} worker(s) on {settings['host']}:{settings['port']}")
+    options = {}
+    if "timeout_worker_healthcheck" in inspect.signature(uvicorn.run).parameters:
+        # Importing the LangChain stack takes seconds; don't let uvicorn restart workers that are still booting
+        options["timeout_worker_healthcheck"] = int(settings["startup_timeout_seconds"])
+    uvicorn.run(
+        "main:app",
+        host=settings["host"],
+        port=int(settings["port"]),
+        workers=settings["workers"],
+        timeout_keep_alive=int(settings["keepalive_seconds"]),
+        timeout_graceful_shutdown=int(settings["graceful_timeout_seconds"]),
+        **options,
+    )
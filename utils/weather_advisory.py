@@ -0,0 +1,126 @@
+from typing import Any, Dict, List, Optional
+from utils.config_loader import load_config
+from utils.forecast_summary import best_outdoor_days, summarize_current, summarize_forecast
+
+# The weather section is mostly formulaic: what to pack follows from temperatures and
+# rain, warnings from thresholds, activities from which days are dry. In "rules" mode
+# the weather agent builds it here from the per-day aggregates without an LLM call.
+
+ADVISORY_MODES = ("rules", "llm")
+
+DEFAULT_ADVISORY_SETTINGS = {
+    "mode": "rules",
+    "polish": False,
+    "thresholds": {
+        "hot_c": 32.0,
+        "warm_c": 26.0,
+        "cool_c": 15.0,
+        "cold_c": 5.0,
+        "rain_probability": 0.5,
+        "heavy_rain_mm": 10.0,
+        "windy_ms": 10.0,
+        "storm_ms": 17.0,
+        "good_day_score": 0.5,
+    },
+}
+
+
+def get_advisory_settings() -> dict:
+    """`weather_advisory` section of config.yaml merged over defaults"""
+    settings = dict(DEFAULT_ADVISORY_SETTINGS)
+    try:
+        configured = load_config().get("weather_advisory", {}) or {}
+    except FileNotFoundError:
+        configured = {}
+    settings.update({key: value for key, value in configured.items() if key != "thresholds"})
+    settings["thresholds"] = {**DEFAULT_ADVISORY_SETTINGS["thresholds"], **(configured.get("thresholds") or {})}
+    return settings
+
+
+def _dates(days: List[Dict[str, Any]]) -> str:
+    return ", ".join(day["date"] for day in days)
+
+
+def build_advisory(current: Optional[Dict[str, Any]], forecast: Optional[Dict[str, Any]],
+                   thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """The six-point weather advisory (fields of agent.schemas.WeatherResult) from raw OpenWeatherMap payloads"""
+    limits = {**DEFAULT_ADVISORY_SETTINGS["thresholds"], **(thresholds or {})}
+    days = summarize_forecast(forecast)
+    current_summary = summarize_current(current) or "Current conditions unavailable"
+
+    highs = [day["temp_max_c"] for day in days if day["temp_max_c"] is not None]
+    lows = [day["temp_min_c"] for day in days if day["temp_min_c"] is not None]
+    wet = [day for day in days if day["rain_probability"] >= limits["rain_probability"] or day["precip_mm"] >= 1.0]
+    heavy = [day for day in days if day["precip_mm"] >= limits["heavy_rain_mm"]]
+    windy = [day for day in days if day["wind_max_ms"] >= limits["windy_ms"]]
+    stormy = [day for day in days if day["wind_max_ms"] >= limits["storm_ms"] or "thunder" in day["conditions"]]
+    hot = [day for day in days if day["temp_max_c"] is not None and day["temp_max_c"] >= limits["hot_c"]]
+    cold = [day for day in days if day["temp_min_c"] is not None and day["temp_min_c"] <= limits["cold_c"]]
+    snowy = [day for day in days if "snow" in day["conditions"]]
+    good = [day for day in days if day["outdoor_score"] >= limits["good_day_score"]]
+    # Prefer good days that are also dry; a rainy week still gets its least rainy days recommended
+    recommended = [day for day in good if day not in wet] or good
+    best = best_outdoor_days(recommended)
+
+    daily = [
+        {
+            "date": day["date"],
+            "temp_min_c": day["temp_min_c"],
+            "temp_max_c": day["temp_max_c"],
+            "conditions": day["conditions"] or "n/a",
+            "rain_probability": day["rain_probability"],
+            "good_for_outdoors": day in recommended,
+        }
+        for day in days if day["temp_min_c"] is not None
+    ]
+
+    packing = ["Comfortable walking shoes"]
+    if highs and max(highs) >= limits["warm_c"]:
+        packing += ["Light, breathable clothing", "Sunscreen, sunglasses and a hat", "Refillable water bottle"]
+    if cold:
+        packing += ["Warm layers (thermal top, fleece or down jacket)", "Gloves and a warm hat"]
+    elif lows and min(lows) < limits["cool_c"]:
+        packing.append("A light jacket or sweater for cool mornings and evenings")
+    if wet:
+        packing += ["Compact umbrella or rain jacket", "Quick-drying or waterproof footwear"]
+    if windy:
+        packing.append("Windproof outer layer")
+    if snowy:
+        packing.append("Insulated, waterproof boots")
+
+    activities = []
+    if best:
+        activities.append(f"Save outdoor sightseeing, walking tours and nature trips for {', '.join(best)}")
+    if wet:
+        activities.append(f"Keep museums, markets, food tours and other indoor plans for wetter days ({_dates(wet)})")
+    if hot:
+        activities.append("Plan outdoor activities for early morning or late afternoon and rest indoors at midday")
+    if cold:
+        activities.append("Mix short outdoor outings with cafés, museums and other warm indoor stops")
+    if days and not activities:
+        activities.append("Conditions look steady: spread outdoor and indoor activities as you like")
+
+    warnings = []
+    if heavy:
+        warnings.append(f"Heavy rain expected on {_dates(heavy)}: allow extra travel time and keep backup indoor plans")
+    if stormy:
+        warnings.append(f"Storms or strong winds possible on {_dates(stormy)}: check local advisories before boat trips or hikes")
+    elif windy:
+        warnings.append(f"Windy on {_dates(windy)}: outdoor tours and ferries may be disrupted")
+    if hot:
+        warnings.append(f"Heat up to {max(day['temp_max_c'] for day in hot):.0f}°C on {_dates(hot)}: stay hydrated and avoid the midday sun")
+    if cold:
+        warnings.append(f"Near-freezing temperatures on {_dates(cold)}")
+    if snowy:
+        warnings.append(f"Snow forecast on {_dates(snowy)}: roads and mountain passes may close")
+    if not days:
+        warnings.append("No forecast available: check the local forecast closer to departure")
+
+    return {
+        "current_summary": current_summary,
+        "daily": daily,
+        "best_outdoor_days": best,
+        "packing": packing,
+        "activity_suggestions": activities,
+        "warnings": warnings,
+    }
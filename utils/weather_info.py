@@ -1,34 +1,77 @@
-import requests
+from utils.http_client import get_async_client, get_sync_client
+from utils.cache import get_cache, normalize_destination_key, cached_call, acached_call
+from utils.gazetteer import get_gazetteer
+from utils.metrics import timed_span
 
 class WeatherForecastTool:
     def __init__(self, api_key:str):
         self.api_key = api_key
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.current_cache = get_cache("current_weather")
+        self.forecast_cache = get_cache("forecast_weather")
+
+    def _location_params(self, place: str) -> dict:
+        """Coordinates from the offline gazetteer (skips OpenWeatherMap's own geocoding), else the name"""
+        match = get_gazetteer().resolve(place)
+        if match is not None:
+            return {"lat": match.latitude, "lon": match.longitude}
+        return {"q": place}
+
+    def _current_params(self, place: str) -> dict:
+        return {
+            **self._location_params(place),
+            "appid": self.api_key,
+            "units": "metric"
+        }
+
+    def _forecast_params(self, place: str) -> dict:
+        return {
+            **self._location_params(place),
+            "appid": self.api_key,
+            "cnt": 40,  # all five days; summarized per day before it reaches a prompt
+            "units": "metric"
+        }
+
+    def _fetch(self, path: str, params: dict) -> dict:
+        with timed_span("tool_call", tool=f"openweathermap{path}"):
+            response = get_sync_client(self.base_url).get(path, params=params)
+        return response.json() if response.status_code == 200 else {}
+
+    async def _afetch(self, path: str, params: dict) -> dict:
+        with timed_span("tool_call", tool=f"openweathermap{path}"):
+            response = await get_async_client(self.base_url).get(path, params=params)
+        return response.json() if response.status_code == 200 else {}
 
     def get_current_weather(self, place:str):
         """Get current weather of a place"""
         try:
-            url = f"{self.base_url}/weather"
-            params = {
-                "q": place,
-                "appid": self.api_key,
-            }
-            response = requests.get(url, params=params)
-            return response.json() if response.status_code == 200 else {}
+            return cached_call(
+                self.current_cache, normalize_destination_key(place),
+                lambda: self._fetch("/weather", self._current_params(place))
+            )
         except Exception as e:
             raise e
     
     def get_forecast_weather(self, place:str):
         """Get weather forecast of a place"""
         try:
-            url = f"{self.base_url}/forecast"
-            params = {
-                "q": place,
-                "appid": self.api_key,
-                "cnt": 10,
-                "units": "metric"
-            }
-            response = requests.get(url, params=params)
-            return response.json() if response.status_code == 200 else {}
+            return cached_call(
+                self.forecast_cache, normalize_destination_key(place),
+                lambda: self._fetch("/forecast", self._forecast_params(place))
+            )
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    async def aget_current_weather(self, place:str):
+        """Get current weather of a place without blocking the event loop"""
+        return await acached_call(
+            self.current_cache, normalize_destination_key(place),
+            lambda: self._afetch("/weather", self._current_params(place))
+        )
+
+    async def aget_forecast_weather(self, place:str):
+        """Get weather forecast of a place without blocking the event loop"""
+        return await acached_call(
+            self.forecast_cache, normalize_destination_key(place),
+            lambda: self._afetch("/forecast", self._forecast_params(place))
+        )